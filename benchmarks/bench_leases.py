@@ -0,0 +1,118 @@
+# Reparto de códigos por préstamos entre varios frontends.
+#
+#   python benchmarks/bench_leases.py --codes 500000 --clients 1,2,4,8 --per-client 20000
+#
+# Mide lease_codes/issue_codes directos sobre la base y después levanta un
+# LeaseServer y lanza procesos que reparten códigos con CodeDispenser sobre
+# LeaseClient, como harían varios bots. Comprueba que ningún código salió dos
+# veces y que un préstamo vencido vuelve a la reserva.
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from stivion_huzz import StivionHuzzRNG  # noqa: E402
+from stivion_huzz.leasing import CodeDispenser, LeaseClient  # noqa: E402
+from stivion_huzz.service import LeaseServer  # noqa: E402
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def frontend(url, consumer, count, batch_size):
+    dispenser = CodeDispenser(LeaseClient(url), consumer, batch_size=batch_size, ttl=60, margin=10,
+                              report_every=batch_size // 2)
+    codes, latencies = [], []
+    for _ in range(count):
+        start = time.perf_counter()
+        code = dispenser.next_code()
+        latencies.append(time.perf_counter() - start)
+        if code is None:
+            break
+        codes.append(code)
+    dispenser.close()
+    return codes, latencies, dispenser.conflicts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--codes", type=int, default=200_000)
+    parser.add_argument("--clients", default="1,2,4,8", help="lista de procesos frontend a probar")
+    parser.add_argument("--per-client", type=int, default=10_000)
+    parser.add_argument("--batch", type=int, default=500, help="códigos por préstamo")
+    parser.add_argument("--workdir", default="bench_leases")
+    parser.add_argument("--json", help="guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    shutil.rmtree(args.workdir, ignore_errors=True)
+    os.makedirs(args.workdir)
+    db_path = os.path.join(args.workdir, "codes.db")
+    rng = StivionHuzzRNG(db_path, concurrent=True)
+    rng.generate_bulk(args.codes, 12, "bench")
+    results = {"codes": args.codes, "cpus": os.cpu_count(), "direct": {}, "service": []}
+
+    for batch in (10, 100, 1000):
+        leases = []
+        start = time.perf_counter()
+        while sum(len(lease["codes"]) for lease in leases) < 20_000:
+            leases.append(rng.lease_codes("direct", batch))
+        lease_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for lease in leases:
+            rng.issue_codes(lease["lease"], lease["codes"])
+        issue_s = time.perf_counter() - start
+        claimed = sum(len(lease["codes"]) for lease in leases)
+        results["direct"][batch] = {"lease_codes_per_s": claimed / lease_s, "issue_codes_per_s": claimed / issue_s}
+        print(f"directo, lotes de {batch}: lease {claimed / lease_s:,.0f} códigos/s, "
+              f"issue {claimed / issue_s:,.0f} códigos/s")
+
+    lease = rng.lease_codes("expira", 100, ttl=1)
+    time.sleep(1.1)
+    again = rng.lease_codes("despues", 100)
+    results["expired_reclaimed"] = set(lease["codes"]) == set(again["codes"])
+    rng.release_lease(again["lease"])
+    print(f"préstamo vencido reclamado: {results['expired_reclaimed']}")
+
+    server = LeaseServer(rng, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    context = multiprocessing.get_context("spawn")
+    for clients in [int(c) for c in args.clients.split(",")]:
+        with context.Pool(clients) as pool:
+            start = time.perf_counter()
+            runs = pool.starmap(frontend, [(server.url, f"bot{i}", args.per_client, args.batch)
+                                           for i in range(clients)])
+            elapsed = time.perf_counter() - start
+        codes = [code for run in runs for code in run[0]]
+        latencies = [latency for run in runs for latency in run[1]]
+        run = {
+            "clients": clients,
+            "handed_out": len(codes),
+            "duplicates": len(codes) - len(set(codes)),
+            "conflicts": sum(run[2] for run in runs),
+            "codes_per_s": len(codes) / elapsed,
+            "next_code_p50_us": percentile(latencies, 0.5) * 1e6,
+            "next_code_p99_us": percentile(latencies, 0.99) * 1e6,
+        }
+        results["service"].append(run)
+        print(f"{clients} frontends: {run['handed_out']:,} códigos, {run['codes_per_s']:,.0f}/s, "
+              f"next_code p50 {run['next_code_p50_us']:.1f} µs p99 {run['next_code_p99_us']:.0f} µs, "
+              f"repetidos {run['duplicates']}, conflictos {run['conflicts']}", flush=True)
+    server.shutdown()
+    server.server_close()
+    rng.close()
+    shutil.rmtree(args.workdir, ignore_errors=True)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# Latencia de listados y filtros antes y después de las migraciones de esquema.
+#
+#   python benchmarks/bench_schema.py --rows 5000000 --json schema.json
+#
+# Crea una base con el esquema original (user_version 0, fechas en texto y
+# metadata como repr de dict), mide las consultas, la migra abriéndola con
+# StivionHuzzRNG y vuelve a medir.
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from stivion_huzz.core import CodeGenerator, StivionHuzzRNG, _migrate_base  # noqa: E402
+
+CATEGORIES = ["general", "warzone", "fortnite", "minecraft", "valorant", "amongus"]
+
+QUERIES = {
+    "list_unused_page": ("SELECT code, category, used FROM codes WHERE used=0 ORDER BY id DESC LIMIT 500", ()),
+    "count_unused": ("SELECT COUNT(*) FROM codes WHERE used=0", ()),
+    "category_unused_page": ("SELECT code, category, used FROM codes WHERE category=? AND used=0 "
+                             "ORDER BY id DESC LIMIT 500", ("valorant",)),
+    "category_unused_count": ("SELECT COUNT(*) FROM codes WHERE category=? AND used=0", ("valorant",)),
+    "stats_by_category": ("SELECT category, COUNT(*), SUM(used) FROM codes GROUP BY category", ()),
+}
+
+
+def seed_legacy(path, rows):
+    conn = sqlite3.connect(path)
+    _migrate_base(conn)
+    generator = CodeGenerator()
+    rnd = random.Random(1)
+    created = "2026-01-01 12:00:00"
+    metadata = str({"generator": "Stivion Huzz RNG Pro", "version": "1.0", "signature": "0" * 64})
+    done = 0
+    while done < rows:
+        n = min(100_000, rows - done)
+        batch = [(code, created, int(rnd.random() < 0.2), rnd.choice(CATEGORIES), metadata)
+                 for code in generator.generate(n, 14, 3)]
+        conn.executemany("INSERT OR IGNORE INTO codes (code, creation_date, used, category, metadata) "
+                         "VALUES (?, ?, ?, ?, ?)", batch)
+        conn.commit()
+        done += n
+    conn.close()
+
+
+def measure(path, repeat):
+    conn = sqlite3.connect(path)
+    results = {}
+    for name, (sql, params) in QUERIES.items():
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            times.append(time.perf_counter() - start)
+        results[name] = statistics.median(times) * 1000
+    conn.close()
+    return results
+
+
+# Bytes ocupados sin contar las páginas libres que deja el DROP de la tabla vieja
+def used_bytes(path):
+    conn = sqlite3.connect(path)
+    page_size, pages, free = (conn.execute(f"PRAGMA {name}").fetchone()[0]
+                              for name in ("page_size", "page_count", "freelist_count"))
+    conn.close()
+    return page_size * (pages - free)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--db", default="bench_schema.db")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    start = time.perf_counter()
+    seed_legacy(args.db, args.rows)
+    print(f"seed {args.rows} filas: {time.perf_counter() - start:.1f} s")
+    size_before = used_bytes(args.db)
+    before = measure(args.db, args.repeat)
+
+    start = time.perf_counter()
+    StivionHuzzRNG(args.db).close()
+    migrate_seconds = time.perf_counter() - start
+    size_after = used_bytes(args.db)
+    after = measure(args.db, args.repeat)
+
+    print(f"migración: {migrate_seconds:.1f} s, datos {size_before / 1e6:.0f} MB -> {size_after / 1e6:.0f} MB")
+    print(f"{'consulta':<24}{'antes (ms)':>12}{'después (ms)':>14}")
+    for name in QUERIES:
+        print(f"{name:<24}{before[name]:>12.2f}{after[name]:>14.2f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"rows": args.rows, "migrate_seconds": migrate_seconds,
+                       "size_before": size_before, "size_after": size_after,
+                       "before_ms": before, "after_ms": after}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
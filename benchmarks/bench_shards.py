@@ -0,0 +1,73 @@
+# Escalado de la generación en paralelo sobre una base repartida en shards.
+#
+#   python benchmarks/bench_shards.py --codes 10000000 --shards 8 --workers 1,2,4,8
+#
+# Para cada número de procesos genera --codes códigos con generate_bulk en una
+# base nueva de --shards shards y mide el tiempo total (incluido lanzar los
+# procesos). Después comprueba que cada código quedó en su shard y mide un
+# canje enrutado y una exportación CSV que recorre todos los shards. Con
+# --secret los códigos se firman (el shard sale del código sin la etiqueta).
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from stivion_huzz.shards import ShardedRNG  # noqa: E402
+from stivion_huzz.signing import CodeSigner  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--codes", type=int, default=1_000_000)
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--workers", default="1,2,4,8", help="lista de procesos a probar")
+    parser.add_argument("--length", type=int, default=12)
+    parser.add_argument("--workdir", default="bench_shards")
+    parser.add_argument("--secret", help="firmar los códigos con esta clave")
+    parser.add_argument("--export", action="store_true", help="medir también la exportación CSV")
+    parser.add_argument("--json", help="guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    signer = CodeSigner(args.secret.encode()) if args.secret else None
+    results = {"codes": args.codes, "shards": args.shards, "signed": signer is not None,
+               "cpus": os.cpu_count(), "runs": []}
+    for workers in [int(w) for w in args.workers.split(",")]:
+        shutil.rmtree(args.workdir, ignore_errors=True)
+        os.makedirs(args.workdir)
+        rng = ShardedRNG(os.path.join(args.workdir, "codes.db"), args.shards, signer=signer)
+        start = time.perf_counter()
+        created = rng.generate_bulk(args.codes, args.length, "bench", workers=workers)
+        elapsed = time.perf_counter() - start
+        run = {"workers": workers, "created": created, "seconds": elapsed, "codes_per_s": created / elapsed}
+
+        sample = [code for (code,) in rng.shards[-1].conn.execute("SELECT code FROM codes LIMIT 1000")]
+        run["misplaced"] = sum(1 for code in sample if rng._shard_index(code) != args.shards - 1)
+        start = time.perf_counter()
+        redeemed = sum(rng.use_code(code) for code in sample)
+        run["use_code_ms"] = (time.perf_counter() - start) * 1000 / len(sample)
+        run["redeemed"] = redeemed
+        if args.export:
+            start = time.perf_counter()
+            rng.export_codes(os.path.join(args.workdir, "codes.csv"))
+            run["export_csv_s"] = time.perf_counter() - start
+        rng.close()
+        results["runs"].append(run)
+        print(f"{workers} procesos: {created:,} códigos en {elapsed:.1f} s ({run['codes_per_s']:,.0f}/s), "
+              f"canje {run['use_code_ms']:.3f} ms" +
+              (f", export {run['export_csv_s']:.1f} s" if args.export else ""), flush=True)
+    shutil.rmtree(args.workdir, ignore_errors=True)
+
+    base = results["runs"][0]["seconds"]
+    for run in results["runs"]:
+        run["speedup"] = base / run["seconds"]
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
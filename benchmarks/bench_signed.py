@@ -0,0 +1,69 @@
+# Rechazo de códigos inventados durante un ataque de fuerza bruta al canje.
+#
+#   python benchmarks/bench_signed.py --codes 200000 --attempts 200000
+#
+# Llena una base con códigos firmados y lanza intentos aleatorios con el mismo
+# formato (longitud y alfabeto) contra use_code/use_codes, con y sin la
+# comprobación de firma delante de SQLite.
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from stivion_huzz import CodeGenerator, CodeSigner, StivionHuzzRNG  # noqa: E402
+
+LENGTH, COMPLEXITY = 14, 2
+
+
+def rate(count, fn):
+    start = time.perf_counter()
+    fn()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--codes", type=int, default=200_000)
+    parser.add_argument("--attempts", type=int, default=200_000)
+    parser.add_argument("--db", default="bench_signed.db")
+    parser.add_argument("--json", help="guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    signer = CodeSigner(os.urandom(32))
+    signed = StivionHuzzRNG(args.db, signer=signer)
+    signed.generate_codes(args.codes, LENGTH, "bench", COMPLEXITY)
+    plain = StivionHuzzRNG(args.db)
+
+    forged = CodeGenerator().generate(args.attempts, LENGTH, COMPLEXITY)
+    db_attempts = forged[:min(args.attempts, 50_000)]
+    results = {
+        "verify_per_s": rate(len(forged), lambda: [signer.verify(code) for code in forged]),
+        "use_code_signed_per_s": rate(len(forged), lambda: [signed.use_code(code) for code in forged]),
+        "use_code_db_only_per_s": rate(len(db_attempts), lambda: [plain.use_code(code) for code in db_attempts]),
+        "use_codes_signed_per_s": rate(len(forged), lambda: [signed.use_codes(forged[i:i + 1000])
+                                                             for i in range(0, len(forged), 1000)]),
+        "use_codes_db_only_per_s": rate(len(db_attempts), lambda: [plain.use_codes(db_attempts[i:i + 1000])
+                                                                   for i in range(0, len(db_attempts), 1000)]),
+    }
+    accepted = sum(1 for code in forged if signer.verify(code))
+    results["forged_accepted"] = accepted
+    # Peor caso con el sesgo del módulo: ceil(256/36)/256 por carácter
+    results["forgery_probability"] = (-(-256 // 36) / 256) ** signer.tag_length
+
+    for name, value in results.items():
+        print(f"{name:<26}{value:>16,.6g}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    signed.close()
+    plain.close()
+    os.remove(args.db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+# Suite de rendimiento de StivionHuzzRNG y de los caminos calientes de la interfaz.
+#
+#   python benchmarks/bench_suite.py --sizes 1000,100000,1000000 --json results.json
+#   python benchmarks/bench_suite.py --sizes 10000000 --json new.json --compare results.json
+#
+# Siembra (y reutiliza en --workdir) una base por tamaño y mide generate_code,
+# use_code, delete_code, list_codes, export_codes (CSV) y export_pdf. Si PySide6
+# está instalado mide también refresh_codes_list con la plataforma "offscreen"
+# de Qt y un webhook local, así que corre en una máquina sin pantalla ni red.
+# Con --compare marca las operaciones que empeoraron respecto de otro JSON.
+import argparse
+import http.server
+import importlib.util
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from stivion_huzz.core import CodeGenerator, StivionHuzzRNG  # noqa: E402
+
+CATEGORIES = ["general", "warzone", "fortnite", "minecraft", "valorant", "amongus"]
+ALL_OPS = ["generate_code", "use_code", "delete_code", "list_codes", "list_codes_page",
+           "export_csv", "export_pdf", "gui"]
+
+
+def summary(times):
+    times = sorted(times)
+    return {
+        "n": len(times),
+        "mean_ms": statistics.fmean(times) * 1000,
+        "median_ms": statistics.median(times) * 1000,
+        "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))] * 1000,
+        "min_ms": times[0] * 1000,
+    }
+
+
+def timed(fn, args_list):
+    times = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    return summary(times)
+
+
+def seed(path, rows):
+    if os.path.exists(path):
+        conn = sqlite3.connect(path)
+        count = conn.execute("SELECT COUNT(*) FROM codes").fetchone()[0]
+        conn.close()
+        if count == rows:
+            return False
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    StivionHuzzRNG(path).close()
+    conn = sqlite3.connect(path)
+    generator = CodeGenerator()
+    rnd = random.Random(rows)
+    created = int(time.time())
+    done = 0
+    while done < rows:
+        n = min(100_000, rows - done)
+        batch = [(code, created, int(rnd.random() < 0.2), rnd.choice(CATEGORIES))
+                 for code in generator.generate(n, 14, 3)]
+        # Los códigos de 14 caracteres casi nunca chocan; se repite hasta llegar justo a `rows`
+        before = conn.total_changes
+        conn.executemany("INSERT OR IGNORE INTO codes (code, creation_date, used, category) "
+                         "VALUES (?, ?, ?, ?)", batch)
+        conn.commit()
+        done += conn.total_changes - before
+    conn.close()
+    return True
+
+
+# Webhook de prueba: acepta cualquier POST con 204 y cuenta las peticiones
+class WebhookStub(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        self.requests = 0
+
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.requests += 1
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+
+def bench_core(path, rows, args, ops, workdir):
+    rng = StivionHuzzRNG(path)
+    results = {}
+    start = time.perf_counter()
+    rng.build_index()
+    results["build_index"] = summary([time.perf_counter() - start])
+
+    codes = []
+    if {"generate_code", "use_code", "delete_code"} & ops:
+        results["generate_code"] = timed(lambda: codes.append(rng.generate_code(12, "bench", 3)["code"]),
+                                         [()] * args.repeat)
+    if "use_code" in ops:
+        results["use_code"] = timed(rng.use_code, [(code,) for code in codes])
+    # Borrar lo generado deja la base con `rows` códigos para la próxima corrida
+    if "delete_code" in ops:
+        results["delete_code"] = timed(rng.delete_code, [(code,) for code in codes])
+    else:
+        for code in codes:
+            rng.delete_code(code)
+
+    if "list_codes" in ops:
+        if rows <= args.max_list_rows:
+            results["list_codes"] = timed(rng.list_codes, [(False,)] * args.list_repeat)
+        else:
+            results["list_codes"] = {"skipped": f"más de {args.max_list_rows} filas"}
+    if "list_codes_page" in ops:
+        deep = rng.c.execute("SELECT id FROM codes ORDER BY id LIMIT 1 OFFSET ?",
+                             (rows // 2,)).fetchone()[0]
+        results["list_codes_page"] = timed(rng.list_codes_page, [(None, 500)] * args.repeat)
+        results["list_codes_page_deep"] = timed(rng.list_codes_page, [(deep, 500)] * args.repeat)
+
+    out = os.path.join(workdir, "export")
+    if "export_csv" in ops:
+        results["export_csv"] = timed(rng.export_codes, [(out + ".csv",)] * args.export_repeat)
+        os.remove(out + ".csv")
+    if "export_pdf" in ops:
+        if importlib.util.find_spec("reportlab") is None:
+            results["export_pdf"] = {"skipped": "reportlab no está instalado"}
+        else:
+            results["export_pdf"] = timed(rng.export_pdf, [(out + ".pdf",)] * args.export_repeat)
+            os.remove(out + ".pdf")
+    rng.close()
+    return results
+
+
+def bench_gui(path, args, app, stub):
+    from PySide6.QtWidgets import QMessageBox
+    from stivion_huzz.gui import StivionHuzzGUI
+
+    QMessageBox.information = staticmethod(lambda *a, **k: QMessageBox.Ok)
+    QMessageBox.warning = staticmethod(lambda *a, **k: QMessageBox.Ok)
+    StivionHuzzGUI.WEBHOOK_URL = stub.url
+    stub.requests = 0
+    results = {}
+
+    start = time.perf_counter()
+    window = StivionHuzzGUI(path)
+    results["gui_startup"] = summary([time.perf_counter() - start])
+    # La reserva escribiría en la base de fondo y movería data_version durante la medición
+    window.reservoir.stop()
+    model = window.codes_model
+    last_id = window.rng.c.execute("SELECT COALESCE(MAX(id), 0) FROM codes").fetchone()[0]
+
+    results["refresh_codes_list_idle"] = timed(window.refresh_codes_list, [()] * args.repeat)
+
+    # Cambio hecho por otra conexión: refresh relee la ventana cargada
+    other = StivionHuzzRNG(path)
+    sample = [row[0] for row in other.c.execute("SELECT code FROM codes WHERE used=0 ORDER BY id DESC LIMIT ?",
+                                                (args.repeat,))]
+    times = []
+    for code in sample:
+        other.c.execute("UPDATE codes SET used=1 WHERE code=?", (code,))
+        other.conn.commit()
+        start = time.perf_counter()
+        window.refresh_codes_list()
+        times.append(time.perf_counter() - start)
+    results["refresh_codes_list_changed"] = summary(times)
+    other.c.executemany("UPDATE codes SET used=0, used_date=NULL WHERE code=?", [(code,) for code in sample])
+    other.conn.commit()
+    other.close()
+
+    results["model_reset"] = timed(model.reset, [()] * args.list_repeat)
+    while model.canFetchMore():
+        model.fetchMore()
+        if len(model.rows) >= 5000:
+            break
+    # Peor caso con 5000 filas cargadas: se olvida data_version para forzar la relectura
+    results["refresh_codes_list_5000_loaded"] = timed(lambda: (setattr(model, "version", None),
+                                                               model.refresh()), [()] * args.list_repeat)
+
+    window.input_count.setText("1")
+    results["gui_generate_code"] = timed(window.generate_code, [()] * args.repeat)
+    deadline = time.time() + 10
+    while window.webhook.pending() and time.time() < deadline:
+        app.processEvents()
+        time.sleep(0.05)
+    results["webhook_requests"] = stub.requests
+
+    created = [row[1] for row in window.rng.codes_since(last_id)]
+    for code in created:
+        window.rng.delete_code(code)
+    window.close()
+    window.rng.close()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    print(f"\n{'tamaño':>10}  {'operación':<32}{'antes (ms)':>12}{'ahora (ms)':>12}{'ratio':>8}")
+    for size, ops in results.items():
+        for name, stats in ops.items():
+            old = baseline.get(size, {}).get(name)
+            if not isinstance(stats, dict) or not isinstance(old, dict) or "median_ms" not in old \
+                    or "median_ms" not in stats:
+                continue
+            ratio = stats["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+            mark = "  <-- peor" if ratio > threshold else ""
+            print(f"{size:>10}  {name:<32}{old['median_ms']:>12.3f}{stats['median_ms']:>12.3f}{ratio:>8.2f}{mark}")
+            if mark:
+                regressions.append((size, name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,100000,1000000",
+                        help="tamaños de base separados por coma (p. ej. 1000,100000,1000000,10000000)")
+    parser.add_argument("--ops", default=",".join(ALL_OPS), help="operaciones a medir: " + ",".join(ALL_OPS))
+    parser.add_argument("--workdir", default="bench_data", help="carpeta donde se guardan las bases sembradas")
+    parser.add_argument("--repeat", type=int, default=200, help="repeticiones de las operaciones de un código")
+    parser.add_argument("--list-repeat", type=int, default=3)
+    parser.add_argument("--export-repeat", type=int, default=1)
+    parser.add_argument("--max-list-rows", type=int, default=1_000_000,
+                        help="list_codes carga toda la tabla; se salta en bases más grandes")
+    parser.add_argument("--json", help="guardar los resultados en este archivo")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="ratio de la mediana a partir del cual se marca una regresión")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    ops = set(args.ops.split(","))
+    os.makedirs(args.workdir, exist_ok=True)
+
+    app = stub = None
+    if "gui" in ops:
+        try:
+            from PySide6.QtWidgets import QApplication
+        except ImportError:
+            print("PySide6 no está instalado: se omiten las mediciones de la interfaz")
+            ops.discard("gui")
+        else:
+            app = QApplication.instance() or QApplication([])
+            stub = WebhookStub()
+
+    results = {}
+    for rows in sizes:
+        path = os.path.join(args.workdir, f"seed_{rows}.db")
+        start = time.perf_counter()
+        if seed(path, rows):
+            print(f"seed {rows} filas: {time.perf_counter() - start:.1f} s")
+        results[str(rows)] = bench_core(path, rows, args, ops, args.workdir)
+        if "gui" in ops:
+            results[str(rows)].update(bench_gui(path, args, app, stub))
+        for name, stats in results[str(rows)].items():
+            if isinstance(stats, dict) and "median_ms" in stats:
+                print(f"{rows:>10}  {name:<32}{stats['median_ms']:>12.3f} ms  (p95 {stats['p95_ms']:.3f})")
+            else:
+                print(f"{rows:>10}  {name:<32}{stats}")
+
+    if stub is not None:
+        stub.shutdown()
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
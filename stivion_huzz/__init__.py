@@ -0,0 +1,10 @@
+# Núcleo sin interfaz: "from stivion_huzz import StivionHuzzRNG" no carga Qt,
+# reportlab ni requests. La ventana está en stivion_huzz.gui y la línea de
+# comandos en stivion_huzz.cli (python -m stivion_huzz). ShardedRNG
+# (stivion_huzz.shards) y el reparto por préstamos (stivion_huzz.leasing y
+# stivion_huzz.service) se importan de sus módulos, así abrir una base normal
+# no los carga.
+from .core import StivionHuzzRNG, CodeGenerator, ExactIndex, BloomIndex
+from .signing import CodeSigner
+
+__version__ = "1.0"
@@ -0,0 +1,249 @@
+# Línea de comandos sobre el núcleo: python -m stivion_huzz <comando>.
+# Solo importa lo que cada comando necesita, para arrancar rápido.
+import argparse
+import sys
+
+from .core import CodeGenerator, StivionHuzzRNG
+
+
+# Los códigos impresos cuentan como entregados; con --quiet quedan en la base
+# sin entregar, para repartirlos con préstamos (serve) o exportarlos
+def cmd_generate(rng, args):
+    if args.quiet:
+        kwargs = {"workers": args.workers} if args.shards else {}
+        count = rng.generate_bulk(args.count, args.length, args.category, args.complexity, args.batch, **kwargs)
+        print(f"{count} códigos generados")
+        return 0
+    if args.count == 1:
+        codes = [rng.generate_code(args.length, args.category, args.complexity, args.batch)["code"]]
+    elif args.shards:
+        codes = [data["code"] for data in rng.generate_codes(args.count, args.length, args.category,
+                                                             args.complexity, args.batch, workers=args.workers)]
+    else:
+        codes = [data["code"] for data in rng.generate_codes(args.count, args.length, args.category,
+                                                             args.complexity, args.batch)]
+    sys.stdout.write("\n".join(codes) + "\n")
+    return 0
+
+
+def cmd_redeem(rng, args):
+    codes = list(args.codes)
+    if args.file:
+        with (sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")) as f:
+            codes.extend(line.strip() for line in f if line.strip())
+    status = rng.use_codes(codes, category=args.category)
+    for code, result in status.items():
+        print(f"{code}\t{result}")
+    return 0 if all(result == "redeemed" for result in status.values()) else 1
+
+
+def cmd_list(rng, args):
+    from .export import iter_code_chunks
+    used = None if args.all else False
+    left = args.limit
+    # Con --shards se recorren los shards uno tras otro
+    for conn in [shard.conn for shard in rng.shards] if args.shards else [rng.conn]:
+        for rows in iter_code_chunks(conn, chunk_size=left or 5000, category=args.category, used=used):
+            for code, category, code_used in rows:
+                print(f"{code}\t{category}" + ("\t[USED]" if code_used else ""))
+            if args.limit:
+                left -= len(rows)
+                break
+        if args.limit and not left:
+            break
+    return 0
+
+
+def cmd_search(rng, args):
+    used = True if args.used else False if args.unused else None
+    rows = rng.search_codes(args.text, contains=args.contains, category=args.category, used=used,
+                            date_from=args.date_from, date_to=args.date_to, limit=args.limit)
+    for _, code, category, code_used in rows:
+        print(f"{code}\t{category}" + ("\t[USED]" if code_used else ""))
+    return 0
+
+
+def cmd_substring_index(rng, args):
+    rng.enable_substring_search(not args.drop)
+    print("Índice de subcadenas " + ("borrado" if args.drop else "creado"))
+    return 0
+
+
+def cmd_import(rng, args):
+    result = rng.import_codes(args.path, fmt=args.format, category=args.category, rejects_path=args.rejects)
+    print(f"{result['read']} filas leídas: {result['imported']} importadas, "
+          f"{result['duplicates']} repetidas, {result['rejected']} rechazadas")
+    return 0 if not result["rejected"] else 1
+
+
+def cmd_export(rng, args):
+    filters = {"category": args.category, "date_from": args.date_from, "date_to": args.date_to}
+    if args.used or args.unused:
+        filters["used"] = bool(args.used)
+    fmt = args.format or ("pdf" if args.path.endswith(".pdf") else "jsonl" if ".jsonl" in args.path else "csv")
+    if fmt == "pdf":
+        count = rng.export_pdf(args.path, by_category=args.by_category, **filters)
+    else:
+        count = rng.export_codes(args.path, fmt=fmt, **filters)
+    print(f"{count} códigos exportados a {args.path}")
+    return 0
+
+
+def cmd_archive(rng, args):
+    count = rng.archive_used(args.days, args.batch)
+    print(f"{count} códigos archivados")
+    return 0
+
+
+def cmd_stats(rng, args):
+    stats = rng.stats()
+    print(f"total\t{stats['total']}")
+    print(f"usados\t{stats['used']}")
+    print(f"sin usar\t{stats['unused']}")
+    print(f"archivados\t{stats['archived']}")
+    print(f"prestados\t{stats['leased']}")
+    for category, counts in stats["categories"].items():
+        print(f"  {category}\t{counts['total']}\t({counts['used']} usados)")
+    return 0
+
+
+def cmd_serve(rng, args):
+    from .service import LeaseServer
+    token = None
+    if args.token_file:
+        with open(args.token_file, encoding="utf-8") as f:
+            token = f.read().strip()
+    server = LeaseServer(rng, args.host, args.port, token)
+    print(f"Servicio de préstamos en {server.url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="stivion_huzz", description="Stivion Huzz RNG - Códigos")
+    parser.add_argument("--db", default="huzz_rng_codes.db", help="ruta de la base SQLite")
+    parser.add_argument("--secret", help="archivo de clave para códigos firmados (se crea si no existe)")
+    parser.add_argument("--bind-category", action="store_true", help="la firma cubre también la categoría")
+    parser.add_argument("--archive", help="archivo SQLite aparte para los códigos archivados")
+    parser.add_argument("--metrics", help="al terminar, escribir métricas en este archivo (.prom o .json)")
+    parser.add_argument("--slow-query-ms", type=float, help="registrar en stderr las consultas más lentas que esto")
+    parser.add_argument("--shards", type=int, help="base repartida en N shards (--db es la ruta base)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("generate", help="generar códigos")
+    p.add_argument("-n", "--count", type=int, default=1)
+    p.add_argument("--length", type=int, default=12)
+    p.add_argument("--complexity", type=int, choices=(1, 2, 3), default=3)
+    p.add_argument("--category", default="general")
+    p.add_argument("--batch", default="", help="prefijo de lote (con --secret queda cubierto por la firma)")
+    p.add_argument("--workers", type=int, help="con --shards: procesos que generan en paralelo")
+    p.add_argument("--quiet", action="store_true",
+                   help="no imprimir los códigos, solo cuántos: quedan sin entregar, para serve o export")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("redeem", help="marcar códigos como usados")
+    p.add_argument("codes", nargs="*")
+    p.add_argument("--file", help="archivo con un código por línea ('-' para stdin)")
+    p.add_argument("--category", help="categoría, para claves con --bind-category")
+    p.set_defaults(func=cmd_redeem)
+
+    p = sub.add_parser("list", help="listar códigos")
+    p.add_argument("--all", action="store_true", help="incluir los usados")
+    p.add_argument("--category")
+    p.add_argument("--limit", type=int, default=50, help="0 = sin límite")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("search", help="buscar códigos por prefijo o subcadena")
+    p.add_argument("text", nargs="?", default="")
+    p.add_argument("--contains", action="store_true", help="buscar el texto en cualquier parte del código")
+    p.add_argument("--category")
+    used = p.add_mutually_exclusive_group()
+    used.add_argument("--used", action="store_true")
+    used.add_argument("--unused", action="store_true")
+    p.add_argument("--from", dest="date_from", help="fecha de creación mínima (YYYY-MM-DD)")
+    p.add_argument("--to", dest="date_to", help="fecha de creación máxima (YYYY-MM-DD)")
+    p.add_argument("--limit", type=int, default=50)
+    p.set_defaults(func=cmd_search, sharded=False)
+
+    p = sub.add_parser("substring-index", help="crear el índice FTS5 para búsquedas --contains rápidas")
+    p.add_argument("--drop", action="store_true", help="borrarlo")
+    p.set_defaults(func=cmd_substring_index, sharded=False)
+
+    p = sub.add_parser("import", help="importar códigos de un CSV o JSONL (también .gz)")
+    p.add_argument("path")
+    p.add_argument("--format", choices=("csv", "jsonl"))
+    p.add_argument("--category", default="general", help="para las filas que no traen categoría")
+    p.add_argument("--rejects", help="CSV donde anotar las filas rechazadas")
+    p.set_defaults(func=cmd_import, sharded=False)
+
+    p = sub.add_parser("export", help="exportar a CSV, JSONL o PDF")
+    p.add_argument("path")
+    p.add_argument("--format", choices=("csv", "jsonl", "pdf"))
+    p.add_argument("--category")
+    used = p.add_mutually_exclusive_group()
+    used.add_argument("--used", action="store_true")
+    used.add_argument("--unused", action="store_true")
+    p.add_argument("--from", dest="date_from", help="fecha de creación mínima (YYYY-MM-DD)")
+    p.add_argument("--to", dest="date_to", help="fecha de creación máxima (YYYY-MM-DD)")
+    p.add_argument("--by-category", action="store_true", help="PDF: una sección por categoría")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("archive", help="mover a archivo los códigos canjeados hace tiempo")
+    p.add_argument("--days", type=float, default=30, help="antigüedad mínima del canje en días")
+    p.add_argument("--batch", type=int, default=5000, help="filas por transacción")
+    p.set_defaults(func=cmd_archive)
+
+    p = sub.add_parser("stats", help="resumen de la base")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("serve", help="servicio HTTP de préstamos de códigos para varios frontends")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--token-file", help="archivo con el token que deben mandar los clientes")
+    p.set_defaults(func=cmd_serve, sharded=False, concurrent=True)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    signer = None
+    if args.secret:
+        from .signing import CodeSigner
+        signer = CodeSigner.from_file(args.secret, bind_category=args.bind_category)
+    metrics = None
+    if args.metrics or args.slow_query_ms is not None:
+        from .metrics import Metrics
+        metrics = Metrics(args.slow_query_ms)
+    # Sin NumPy: importarlo cuesta más de 100 ms y bytes.translate no es más
+    # lento ni en tandas grandes
+    generator = CodeGenerator(use_numpy=False)
+    if args.shards:
+        if not getattr(args, "sharded", True):
+            print(f"Error: {args.command} no está disponible con --shards", file=sys.stderr)
+            return 2
+        if args.archive:
+            print("Error: con --shards cada shard guarda su propio archivo", file=sys.stderr)
+            return 2
+        from .shards import ShardedRNG
+        try:
+            rng = ShardedRNG(args.db, args.shards, signer=signer, metrics=metrics, generator=generator)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+    else:
+        rng = StivionHuzzRNG(args.db, generator=generator, signer=signer, metrics=metrics, archive_path=args.archive,
+                             concurrent=getattr(args, "concurrent", False))
+    try:
+        return args.func(rng, args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        rng.close()
+        if args.metrics:
+            metrics.write(args.metrics)
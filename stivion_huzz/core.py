@@ -0,0 +1,1107 @@
+# Lógica de generación y almacenamiento de códigos. Solo usa la librería
+# estándar: se puede importar sin Qt, reportlab ni requests.
+import sys
+import os
+import ast
+import json
+import string
+import sqlite3
+import threading
+import time
+from datetime import datetime
+import hashlib
+import math
+
+from .metrics import RETRY_BUCKETS
+
+
+# --- Motor de generación de candidatos ---
+# Saca bytes de os.urandom en bloques grandes y los convierte en caracteres del
+# alfabeto con muestreo por rechazo: solo se aceptan bytes < limit, siendo limit
+# el mayor múltiplo del tamaño del alfabeto que cabe en 256, así que cada
+# carácter sale con la misma probabilidad. Con NumPy el mapeo se hace sobre
+# arrays; sin NumPy lo hace bytes.translate, que también trabaja en C.
+class CodeGenerator:
+    ALPHABETS = {
+        1: string.digits,
+        2: string.ascii_uppercase + string.digits,
+        3: string.ascii_letters + string.digits + "!@#$%^&*()",
+    }
+
+    def __init__(self, use_numpy=None, buffer_size=1 << 16):
+        self.buffer_size = buffer_size
+        self.use_numpy = use_numpy
+        self._np = None
+        self._tables = {}
+        self._leftover = {}
+        self._lock = threading.Lock()
+
+    # NumPy se importa la primera vez que hace falta, no al crear el generador
+    @property
+    def np(self):
+        if self._np is None and self.use_numpy is not False:
+            try:
+                import numpy
+                self._np = numpy
+            except ImportError:
+                if self.use_numpy:
+                    raise
+                self.use_numpy = False
+        return self._np
+
+    def alphabet(self, complexity):
+        return self.ALPHABETS.get(complexity, self.ALPHABETS[3])
+
+    def _table(self, complexity):
+        if complexity not in self._tables:
+            chars = self.alphabet(complexity).encode('ascii')
+            limit = 256 - 256 % len(chars)
+            table = bytes(chars[b % len(chars)] if b < limit else 0 for b in range(256))
+            self._tables[complexity] = (limit, table, bytes(range(limit, 256)))
+        return self._tables[complexity]
+
+    def _random_chars(self, count, complexity):
+        limit, table, rejected = self._table(complexity)
+        with self._lock:
+            # Lo que sobra de cada bloque se guarda para las siguientes llamadas,
+            # así pedir un solo código no cuesta un os.urandom entero
+            out = self._leftover.get(complexity, bytearray())
+            while len(out) < count:
+                missing = count - len(out)
+                size = max(self.buffer_size, missing * 256 // limit + 64)
+                raw = os.urandom(size)
+                if self.np is not None:
+                    buf = self.np.frombuffer(raw, dtype=self.np.uint8)
+                    lut = self.np.frombuffer(table, dtype=self.np.uint8)
+                    out += lut[buf[buf < limit]].tobytes()
+                else:
+                    out += raw.translate(table, rejected)
+            self._leftover[complexity] = out[count:]
+        return out[:count].decode('ascii')
+
+    def generate(self, n, length=12, complexity=3):
+        chars = self._random_chars(n * length, complexity)
+        return [chars[i:i + length] for i in range(0, n * length, length)]
+
+    def keyspace(self, length=12, complexity=3):
+        return len(self.alphabet(complexity)) ** length
+
+    # Probabilidad de que un candidato nuevo choque con uno de los `existing` ya emitidos
+    def collision_rate(self, length=12, complexity=3, existing=0):
+        return existing / self.keyspace(length, complexity)
+
+    # Choques esperados al generar n códigos más sobre `existing` (aprox. del cumpleaños)
+    def expected_collisions(self, n, length=12, complexity=3, existing=0):
+        keyspace = self.keyspace(length, complexity)
+        return n * existing / keyspace + n * (n - 1) / (2 * keyspace)
+
+
+# --- Índices de existencia en memoria ---
+# Evitan ir a SQLite cuando un código seguro que no existe. El índice exacto es
+# un set; el Bloom ocupa ~1.2 bytes por código al 1% de falsos positivos, pero
+# un "sí" hay que confirmarlo en la base y no admite borrados.
+class ExactIndex:
+    exact = True
+
+    def __init__(self):
+        self.codes = set()
+
+    def __contains__(self, code):
+        return code in self.codes
+
+    def __len__(self):
+        return len(self.codes)
+
+    def add(self, code):
+        self.codes.add(code)
+
+    def update(self, codes):
+        self.codes.update(codes)
+
+    def discard(self, code):
+        self.codes.discard(code)
+
+    def full(self):
+        return False
+
+    def memory_usage(self):
+        return sys.getsizeof(self.codes) + sum(sys.getsizeof(code) for code in self.codes)
+
+
+class BloomIndex:
+    exact = False
+
+    def __init__(self, capacity, fp_rate=0.01):
+        self.capacity = max(int(capacity), 1)
+        self.fp_rate = fp_rate
+        self.num_bits = self.bits_for(self.capacity, fp_rate)
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def bits_for(capacity, fp_rate):
+        return max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+
+    # El índice vive solo en este proceso, así que sirve el hash() de Python
+    # (SipHash); de sus 64 bits salen las k posiciones por doble hashing
+    def _positions(self, code):
+        h = hash(code) & 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def __contains__(self, code):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(code))
+
+    def __len__(self):
+        return self.count
+
+    # Con lock: un |= sobre el bytearray no es atómico entre hilos y perder un
+    # bit daría un falso negativo
+    def add(self, code):
+        with self.lock:
+            for p in self._positions(code):
+                self.bits[p >> 3] |= 1 << (p & 7)
+            self.count += 1
+
+    def update(self, codes):
+        bits, m, k = self.bits, self.num_bits, range(self.num_hashes)
+        with self.lock:
+            for code in codes:
+                h = hash(code) & 0xFFFFFFFFFFFFFFFF
+                h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+                for i in k:
+                    p = (h1 + i * h2) % m
+                    bits[p >> 3] |= 1 << (p & 7)
+                self.count += 1
+
+    def discard(self, code):
+        # Un Bloom no puede quitar elementos: el código borrado solo cuesta
+        # algún SELECT de más hasta el próximo rebuild
+        pass
+
+    def full(self):
+        return self.count > self.capacity
+
+    def memory_usage(self):
+        return sys.getsizeof(self.bits)
+
+
+# Combinaciones fijas de longitud/complejidad/categoría que ofrece la interfaz
+PRESETS = {
+    "Personalizado": {"length": 12, "complexity": 3, "category": "general"},
+    "Warzone": {"length": 12, "complexity": 2, "category": "warzone"},
+    "Fortnite": {"length": 10, "complexity": 3, "category": "fortnite"},
+    "Minecraft": {"length": 16, "complexity": 3, "category": "minecraft"},
+    "Valorant": {"length": 15, "complexity": 2, "category": "valorant"},
+    "Among Us": {"length": 8, "complexity": 1, "category": "amongus"},
+}
+
+
+# --- Esquema y migraciones ---
+# La versión del esquema se guarda en PRAGMA user_version. MIGRATIONS[i] lleva
+# la base de la versión i a la i+1; las bases anteriores a este sistema tienen
+# user_version 0 y la tabla codes original, así que la 1 es un CREATE IF NOT EXISTS.
+GENERATOR = "Stivion Huzz RNG Pro"
+GENERATOR_VERSION = "1.0"
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def to_epoch(value, end_of_day=False):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    if len(value) == 10:
+        value += " 23:59:59" if end_of_day else " 00:00:00"
+    return int(datetime.strptime(value, DATE_FORMAT).timestamp())
+
+
+def format_epoch(value):
+    return datetime.fromtimestamp(value).strftime(DATE_FORMAT) if value is not None else None
+
+
+# Filtros comunes de listados, búsquedas y exportaciones. indexed=False antepone
+# un + unario a las columnas para que SQLite no use sus índices y recorra el que
+# elige la consulta (p. ej. el rango de prefijo sobre code).
+def code_filters(category=None, used=None, date_from=None, date_to=None, indexed=True):
+    clauses, params = [], []
+    plus = "" if indexed else "+"
+    if category is not None:
+        clauses.append(f"{plus}category = ?")
+        params.append(category)
+    if used is not None:
+        clauses.append(f"{plus}used = ?")
+        params.append(1 if used else 0)
+    # Fechas: epoch, datetime o texto 'YYYY-MM-DD[ HH:MM:SS]' en hora local
+    if date_from is not None:
+        clauses.append("creation_date >= ?")
+        params.append(to_epoch(date_from))
+    if date_to is not None:
+        clauses.append("creation_date <= ?")
+        params.append(to_epoch(date_to, end_of_day=True))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+# Hash de 64 bits con signo, para guardarlo como INTEGER PRIMARY KEY (el rowid)
+def code_hash(code):
+    return int.from_bytes(hashlib.blake2b(code.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+CODES_TABLE = '''(id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  code TEXT UNIQUE,
+                  creation_date INTEGER,
+                  used INTEGER NOT NULL DEFAULT 0,
+                  used_date INTEGER,
+                  category TEXT,
+                  metadata TEXT)'''
+# El id es el mismo que tenía en codes, así que archivar dos veces el mismo
+# lote (p. ej. tras un corte entre dos archivos adjuntos) no duplica filas
+ARCHIVE_TABLE = '''(id INTEGER PRIMARY KEY,
+                    code TEXT,
+                    creation_date INTEGER,
+                    used_date INTEGER,
+                    category TEXT,
+                    metadata TEXT,
+                    archived_date INTEGER)'''
+
+
+def _migrate_base(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS codes
+                    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                     code TEXT UNIQUE,
+                     creation_date TEXT,
+                     used BOOLEAN DEFAULT 0,
+                     used_date TEXT,
+                     category TEXT,
+                     metadata TEXT)''')
+
+
+# (used, id) sirve el listado de no usados ordenado por id; (category, used)
+# lleva el rowid al final, así que también resuelve categoría + estado + orden
+def _migrate_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_codes_used_id ON codes (used, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_codes_category_used ON codes (category, used)")
+
+
+# Fechas como segundos epoch (INTEGER) y metadata en JSON compacto. Los campos
+# que eran iguales en todas las filas (generador y versión) pasan a la tabla
+# meta, y la firma sha256(code) se puede recalcular, así que las filas con la
+# metadata estándar se quedan con NULL.
+def _migrate_epoch_json(conn):
+    standard_prefix = str({"generator": GENERATOR, "version": GENERATOR_VERSION, "signature": ""})[:-2]
+
+    def metadata_to_json(value):
+        if value is None:
+            return None
+        try:
+            data = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return json.dumps({"raw": value}, separators=(',', ':'))
+        for key in ("generator", "version", "signature"):
+            data.pop(key, None)
+        return json.dumps(data, separators=(',', ':')) if data else None
+
+    conn.create_function("metadata_to_json", 1, metadata_to_json, deterministic=True)
+    conn.execute('''CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)''')
+    conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                     [("generator", GENERATOR), ("version", GENERATOR_VERSION)])
+    conn.execute("CREATE TABLE codes_new " + CODES_TABLE)
+    # Las fechas viejas están en hora local; el modificador 'utc' las pasa a UTC
+    conn.execute('''INSERT INTO codes_new (id, code, creation_date, used, used_date, category, metadata)
+                    SELECT id, code,
+                           CAST(strftime('%s', creation_date, 'utc') AS INTEGER),
+                           COALESCE(used, 0),
+                           CAST(strftime('%s', used_date, 'utc') AS INTEGER),
+                           category,
+                           CASE WHEN substr(metadata, 1, ?) = ? AND length(metadata) = ? THEN NULL
+                                ELSE metadata_to_json(metadata) END
+                    FROM codes''', (len(standard_prefix), standard_prefix, len(standard_prefix) + 66))
+    conn.execute("DROP TABLE codes")
+    conn.execute("ALTER TABLE codes_new RENAME TO codes")
+    _migrate_indexes(conn)
+
+
+# Reserva de códigos ya generados y todavía sin entregar, por preset. Que un
+# código esté aquí o en codes es su estado: en la reserva nadie lo tiene aún.
+def _migrate_code_pool(conn):
+    conn.execute('''CREATE TABLE code_pool
+                    (id INTEGER PRIMARY KEY,
+                     code TEXT UNIQUE,
+                     preset TEXT NOT NULL,
+                     category TEXT,
+                     creation_date INTEGER)''')
+    conn.execute("CREATE INDEX idx_code_pool_preset ON code_pool (preset, id)")
+
+
+# Archivo de códigos canjeados. archived_hashes guarda solo el hash de 64 bits
+# de cada código archivado (unos 10 bytes por fila en el B-tree del rowid) y es
+# lo que consultan las comprobaciones de unicidad, esté el archivo en esta
+# base o en otra adjunta.
+def _migrate_archive(conn):
+    conn.execute("CREATE TABLE codes_archive " + ARCHIVE_TABLE)
+    conn.execute("CREATE TABLE archived_hashes (hash INTEGER PRIMARY KEY)")
+
+
+# Reparto por préstamos (ver lease_codes): lease_id marca los códigos apartados
+# para un frontend e issued_date los que ya se entregaron, por un préstamo o
+# directamente (generate_code, generate_codes, la reserva). El índice parcial
+# de libres se achica a medida que se reparten, así apartar un lote cuesta lo
+# mismo aunque la tabla esté llena de códigos entregados.
+def _add_lease_columns(conn):
+    conn.execute("ALTER TABLE codes ADD COLUMN lease_id INTEGER")
+    conn.execute("ALTER TABLE codes ADD COLUMN issued_date INTEGER")
+
+
+def _create_lease_indexes(conn):
+    conn.execute("CREATE INDEX idx_codes_free ON codes (category) "
+                 "WHERE used=0 AND lease_id IS NULL AND issued_date IS NULL")
+    conn.execute("CREATE INDEX idx_codes_lease ON codes (lease_id) WHERE lease_id IS NOT NULL")
+
+
+# AUTOINCREMENT: un frontend con un préstamo viejo nunca coincide con uno nuevo
+def _migrate_leases(conn):
+    conn.execute('''CREATE TABLE leases
+                    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                     consumer TEXT NOT NULL,
+                     created INTEGER,
+                     expires INTEGER NOT NULL)''')
+    conn.execute("CREATE INDEX idx_leases_expires ON leases (expires)")
+    _add_lease_columns(conn)
+    # Hasta ahora la única forma de sacar un código era generarlo y entregarlo:
+    # los que ya había se toman por entregados
+    conn.execute("UPDATE codes SET issued_date = COALESCE(creation_date, 0)")
+    _create_lease_indexes(conn)
+
+
+# Contador de canjes y borrados en codes, mantenido por triggers. Con MAX(id)
+# (que ya cubre las altas) forma codes_version: la interfaz lo compara para no
+# releer el listado cuando otra conexión solo escribió en otras tablas (la
+# bandeja del webhook, la reserva, los préstamos).
+def _migrate_codes_changes(conn):
+    conn.execute("CREATE TABLE codes_changes (id INTEGER PRIMARY KEY CHECK (id = 0), count INTEGER NOT NULL)")
+    conn.execute("INSERT INTO codes_changes (id, count) VALUES (0, 0)")
+    _create_change_triggers(conn)
+
+
+def _create_change_triggers(conn):
+    conn.execute('''CREATE TRIGGER codes_changes_au AFTER UPDATE OF used ON codes BEGIN
+                        UPDATE codes_changes SET count = count + 1 WHERE id = 0;
+                    END''')
+    conn.execute('''CREATE TRIGGER codes_changes_ad AFTER DELETE ON codes BEGIN
+                        UPDATE codes_changes SET count = count + 1 WHERE id = 0;
+                    END''')
+
+
+# Bandeja de salida del webhook (ver webhook.py). Las bases en las que ya la
+# había creado el dispatcher (con la fecha en texto) se pasan a epoch.
+def _migrate_webhook_outbox(conn):
+    conn.execute('''CREATE TABLE webhook_outbox_new
+                    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                     code TEXT,
+                     created_date INTEGER)''')
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='webhook_outbox'").fetchone():
+        conn.execute('''INSERT INTO webhook_outbox_new (id, code, created_date)
+                        SELECT id, code, CAST(strftime('%s', created_date, 'utc') AS INTEGER)
+                        FROM webhook_outbox''')
+        conn.execute("DROP TABLE webhook_outbox")
+    conn.execute("ALTER TABLE webhook_outbox_new RENAME TO webhook_outbox")
+
+
+# Índice de subcadenas (opcional, ver enable_substring_search): tabla FTS5 con
+# tokenizer trigram que apunta a codes (external content) y se mantiene con
+# triggers. detail=none basta para GLOB y ocupa menos de la mitad.
+def _create_substring_index(conn):
+    conn.execute("CREATE VIRTUAL TABLE codes_fts USING fts5(code, content='codes', content_rowid='id', "
+                 "tokenize='trigram case_sensitive 1', detail=none)")
+    _create_substring_triggers(conn)
+    conn.execute("INSERT INTO codes_fts (codes_fts) VALUES ('rebuild')")
+
+
+def _create_substring_triggers(conn):
+    conn.execute('''CREATE TRIGGER codes_fts_ai AFTER INSERT ON codes BEGIN
+                        INSERT INTO codes_fts (rowid, code) VALUES (new.id, new.code);
+                    END''')
+    conn.execute('''CREATE TRIGGER codes_fts_ad AFTER DELETE ON codes BEGIN
+                        INSERT INTO codes_fts (codes_fts, rowid, code) VALUES ('delete', old.id, old.code);
+                    END''')
+    conn.execute('''CREATE TRIGGER codes_fts_au AFTER UPDATE OF code ON codes BEGIN
+                        INSERT INTO codes_fts (codes_fts, rowid, code) VALUES ('delete', old.id, old.code);
+                        INSERT INTO codes_fts (rowid, code) VALUES (new.id, new.code);
+                    END''')
+
+
+def _drop_substring_index(conn):
+    for trigger in ("codes_fts_ai", "codes_fts_ad", "codes_fts_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("DROP TABLE IF EXISTS codes_fts")
+
+
+def _glob_escape(text):
+    return "".join(f"[{ch}]" if ch in "*?[" else ch for ch in text)
+
+
+MIGRATIONS = [
+    _migrate_base,
+    _migrate_indexes,
+    _migrate_epoch_json,
+    _migrate_code_pool,
+    _migrate_archive,
+    _migrate_leases,
+    _migrate_codes_changes,
+    _migrate_webhook_outbox,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+# Cada paso va en su propia transacción IMMEDIATE y vuelve a leer la versión
+# dentro de ella, así dos procesos que arrancan a la vez no migran dos veces
+def migrate(conn):
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        # Las bases nuevas nacen con auto_vacuum incremental (solo se puede elegir
+        # antes de crear la primera tabla); delete_all_codes lo usa para devolver
+        # el espacio al sistema
+        if conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version >= SCHEMA_VERSION:
+                    conn.execute("COMMIT")
+                    return version
+                MIGRATIONS[version](conn)
+                conn.execute(f"PRAGMA user_version={version + 1}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+    finally:
+        conn.isolation_level = isolation_level
+
+
+# --- Clase principal de lógica RNG ---
+class StivionHuzzRNG:
+    # index: None (sin índice), "set", "bloom" o "auto" (set hasta exact_limit filas).
+    # Si otra conexión escribe en la base (PRAGMA data_version cambia), cada
+    # método público primero agrega al índice los códigos con id mayor al
+    # último que vio. Con concurrent=True no se puede usar.
+    # concurrent: varios hilos/procesos contra la misma base (WAL, busy_timeout y
+    # una conexión por hilo en vez de la conexión compartida)
+    # signer: un CodeSigner; los códigos nuevos llevan firma y use_code/use_codes
+    # rechazan sin ir a la base los que no la pasan (pensado para bases donde todos
+    # los códigos están firmados con esa clave)
+    # metrics: un Metrics (ver metrics.py) para medir los métodos públicos y
+    # contar las consultas y commits de cada uno
+    # archive_path: archivo SQLite aparte (se adjunta como "archive") para los
+    # códigos que archive_used saca de codes; sin él van a codes_archive en esta base
+    PUBLIC_METHODS = ("generate_code", "generate_codes", "generate_bulk", "use_code", "use_codes", "delete_code",
+                      "delete_all_codes", "archive_used", "list_codes", "search_codes",
+                      "enable_substring_search", "import_codes", "export_codes", "export_pdf", "list_codes_page",
+                      "codes_since", "stats", "build_index", "lease_codes", "issue_codes", "renew_lease",
+                      "release_lease", "reclaim_expired_leases", "leases")
+
+    def __init__(self, db_path='huzz_rng_codes.db', generator=None, index=None,
+                 fp_rate=0.01, exact_limit=1_000_000, concurrent=False, busy_timeout=30000,
+                 signer=None, metrics=None, archive_path=None):
+        self.db_path = db_path
+        self.metrics = metrics
+        self.archive_path = archive_path
+        self.archive_table = "archive.codes_archive" if archive_path else "main.codes_archive"
+        if metrics is not None:
+            metrics.instrument(self, self.PUBLIC_METHODS)
+        self.generator = generator or CodeGenerator()
+        self.signer = signer
+        self.concurrent = concurrent
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._conn = self._connect()
+        self._c = self._conn.cursor()
+        self._initialize_database()
+        self.index = None
+        self.index_mode = index
+        if index and concurrent:
+            raise ValueError("El índice en memoria no ve lo que escriben otras conexiones: "
+                             "no se puede usar con concurrent=True")
+        self.fp_rate = fp_rate
+        self.exact_limit = exact_limit
+        if index:
+            self.build_index()
+
+    def _connect(self):
+        if not self.concurrent:
+            conn = sqlite3.connect(self.db_path)
+        else:
+            # IMMEDIATE: las escrituras piden el lock al empezar la transacción, así
+            # dos escritores no se bloquean mutuamente al subir de lectura a escritura
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout / 1000,
+                                   isolation_level="IMMEDIATE", check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout)}")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        if self.archive_path:
+            conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+            if self.concurrent:
+                conn.execute("PRAGMA archive.journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS archive.codes_archive " + ARCHIVE_TABLE)
+        if self.metrics is not None:
+            conn.set_trace_callback(self.metrics.trace)
+        return conn
+
+    @property
+    def conn(self):
+        if not self.concurrent:
+            return self._conn
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            self._local.c = conn.cursor()
+        return conn
+
+    @property
+    def c(self):
+        if not self.concurrent:
+            return self._c
+        self.conn  # abre la conexión de este hilo si aún no existe
+        return self._local.c
+
+    def _initialize_database(self):
+        migrate(self.conn)
+
+    def _metadata(self, code):
+        if self.signer is not None:
+            return {
+                "generator": GENERATOR,
+                "version": GENERATOR_VERSION,
+                "signed": True,
+                "key_id": self.signer.key_id
+            }
+        return {
+            "generator": GENERATOR,
+            "version": GENERATOR_VERSION,
+            "signature": hashlib.sha256(code.encode()).hexdigest()
+        }
+
+    # Con firma, los últimos caracteres del código son la etiqueta HMAC y el
+    # prefijo del lote (batch) va al principio, cubierto por la firma
+    def _body_length(self, length, batch=""):
+        if self.signer is None:
+            return length - len(batch)
+        body_length = length - self.signer.tag_length - len(batch)
+        if body_length < 4:
+            raise ValueError("El código es demasiado corto para llevar firma")
+        return body_length
+
+    def _candidates(self, n, length, category, complexity, batch=""):
+        return self._sign(self._bodies(n, length, complexity, batch), category)
+
+    # Códigos sin la etiqueta de la firma (con el lote delante)
+    def _bodies(self, n, length, complexity, batch=""):
+        if batch and not set(batch) <= set(self.generator.alphabet(complexity)):
+            raise ValueError("El lote debe usar los caracteres de la complejidad elegida")
+        bodies = self.generator.generate(n, self._body_length(length, batch), complexity)
+        return [batch + body for body in bodies] if batch else bodies
+
+    def _sign(self, bodies, category):
+        if self.signer is None:
+            return bodies
+        sign = self.signer.sign
+        return [sign(body, category) for body in bodies]
+
+    def _keyspace(self, length, complexity, batch=""):
+        return len(self.generator.alphabet(complexity)) ** self._body_length(length, batch)
+
+    # True/False si la firma decide, None si no hay firma o no se puede comprobar
+    def verify_code(self, code, category=None):
+        if self.signer is None:
+            return None
+        return self.signer.verify(code, category)
+
+    # Recorre la tabla en bloques para no cargarla entera de una vez
+    # Incluye los códigos archivados: el índice decide la unicidad
+    def build_index(self):
+        # Antes de leer: lo que otra conexión escriba durante el recorrido lo
+        # vuelve a traer _sync_index (agregar dos veces no cambia el índice)
+        self._index_version = self.data_version()
+        self._index_max_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM codes").fetchone()[0]
+        count = self.conn.execute(f"SELECT (SELECT COUNT(*) FROM codes) + "
+                                  f"(SELECT COUNT(*) FROM {self.archive_table})").fetchone()[0]
+        mode = self.index_mode
+        if mode == "auto":
+            mode = "set" if count <= self.exact_limit else "bloom"
+        if mode == "set":
+            index = ExactIndex()
+        else:
+            index = BloomIndex(max(2 * count, 100_000), self.fp_rate)
+        cursor = self.conn.execute(f"SELECT code FROM codes UNION ALL SELECT code FROM {self.archive_table}")
+        while True:
+            rows = cursor.fetchmany(10_000)
+            if not rows:
+                break
+            index.update(code for (code,) in rows)
+        self.index = index
+
+    def _index_add(self, code):
+        if self.index is not None:
+            self.index.add(code)
+            if self.index.full():
+                self.build_index()
+
+    def _may_exist(self, code):
+        return self.index is None or code in self.index
+
+    # Solo las altas de otra conexión pueden volver falso un "no existe" del
+    # índice (lo que borran o canjean se confirma en SQLite igual), y los ids
+    # solo crecen: basta traer las filas nuevas. Sin escrituras ajenas cuesta
+    # un PRAGMA por llamada, no por código.
+    def _sync_index(self):
+        if self.index is None:
+            return
+        version = self.data_version()
+        if version == self._index_version:
+            return
+        self._index_version = version
+        cursor = self.conn.execute("SELECT id, code FROM codes WHERE id > ? ORDER BY id", (self._index_max_id,))
+        while True:
+            rows = cursor.fetchmany(10_000)
+            if not rows:
+                break
+            self.index.update(code for _, code in rows)
+            self._index_max_id = rows[-1][0]
+        if self.index.full():
+            self.build_index()
+
+    # Después de escrituras propias ya confirmadas: si nadie más escribió, las
+    # filas nuevas son nuestras y ya están en el índice
+    def _index_caught_up(self):
+        if self.index is not None and self.data_version() == self._index_version:
+            self._index_max_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM codes").fetchone()[0]
+
+    def index_memory_usage(self):
+        return self.index.memory_usage() if self.index is not None else 0
+
+    def generate_code(self, length=12, category="general", complexity=3, batch=""):
+        self._sync_index()
+        retries = 0
+        while True:
+            code = self._candidates(1, length, category, complexity, batch)[0]
+            if not self._may_exist(code):
+                break
+            if self.index is None or not self.index.exact:
+                self.c.execute("SELECT code FROM codes WHERE code=?", (code,))
+                if not self.c.fetchone() and not self._archived(code):
+                    break
+            retries += 1
+        if self.metrics is not None:
+            self._count_retries("generate_code", retries)
+
+        created = int(time.time())
+        self.c.execute("INSERT INTO codes (code, creation_date, category, issued_date) VALUES (?, ?, ?, ?)",
+                      (code, created, category, created))
+        self.conn.commit()
+        self._index_add(code)
+        self._index_caught_up()
+        return {
+            "code": code,
+            "category": category,
+            "metadata": self._metadata(code),
+            "creation_date": format_epoch(created)
+        }
+
+    # Genera n códigos en una sola transacción. Los candidatos repetidos
+    # (contra la tabla o dentro del mismo lote) los rechaza el INSERT OR IGNORE
+    # y solo esos se vuelven a generar. Los códigos devueltos quedan como
+    # entregados: lease_codes no los vuelve a dar.
+    def generate_codes(self, n, length=12, category="general", complexity=3, batch=""):
+        created = int(time.time())
+        creation_date = format_epoch(created)
+        return [{
+            "code": code,
+            "category": category,
+            "metadata": self._metadata(code),
+            "creation_date": creation_date
+        } for code in self._generate(n, length, category, complexity, batch, created, True, "generate_codes")]
+
+    # Para llenar la base sin entregar nada: los códigos quedan libres para
+    # lease_codes (o se sacan con export_codes) y solo se devuelve cuántos se crearon
+    def generate_bulk(self, n, length=12, category="general", complexity=3, batch=""):
+        return len(self._generate(n, length, category, complexity, batch, int(time.time()), False, "generate_bulk"))
+
+    def _generate(self, n, length, category, complexity, batch, created, issued, operation):
+        keyspace = self._keyspace(length, complexity, batch)
+        # Contar los códigos de esa longitud recorre toda la tabla; solo vale la
+        # pena cuando el espacio de códigos es lo bastante chico para agotarse
+        if keyspace < 1 << 40:
+            self.c.execute("SELECT COUNT(*) FROM codes WHERE length(code)=?", (length,))
+            if self.c.fetchone()[0] + n > keyspace:
+                raise ValueError("No quedan suficientes códigos libres para esa longitud y complejidad")
+        self._sync_index()
+        created_codes = []
+        pending = n
+        attempts = 0
+        with self.conn:
+            while pending:
+                candidates = set(self._candidates(pending, length, category, complexity, batch))
+                attempts += pending
+                created_codes.extend(self._insert_new(candidates, created, category, issued))
+                pending = n - len(created_codes)
+        self._index_caught_up()
+        if self.metrics is not None:
+            self._count_retries(operation, attempts - n)
+        return created_codes
+
+    # Inserta (dentro de la transacción abierta) los candidatos que no están en
+    # codes ni en el archivo y devuelve los que entraron. issued: se entregan
+    # ya (issued_date = created) o quedan libres para lease_codes.
+    def _insert_new(self, candidates, created, category, issued=True):
+        inserted = []
+        issued_date = created if issued else None
+        for code in candidates:
+            self.c.execute("INSERT OR IGNORE INTO codes (code, creation_date, category, issued_date) "
+                           "SELECT ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM archived_hashes WHERE hash=?)",
+                           (code, created, category, issued_date, code_hash(code)))
+            if self.c.rowcount > 0:
+                self._index_add(code)
+                inserted.append(code)
+        return inserted
+
+    def _archived(self, code):
+        return self.conn.execute("SELECT 1 FROM archived_hashes WHERE hash=?", (code_hash(code),)).fetchone() is not None
+
+    def _count_retries(self, operation, retries):
+        self.metrics.observe("generation_retries", retries, buckets=RETRY_BUCKETS, operation=operation)
+        if retries:
+            self.metrics.inc("collision_retries_total", retries, operation=operation)
+
+    def use_code(self, code, category=None):
+        if self.verify_code(code, category) is False:
+            return False
+        self._sync_index()
+        if not self._may_exist(code):
+            return False
+        self.c.execute("UPDATE codes SET used=1, used_date=? WHERE code=? AND used=0",
+                      (int(time.time()), code))
+        affected = self.c.rowcount
+        self.conn.commit()
+        return affected > 0
+
+    # Canjea una lista de códigos en una sola transacción. Devuelve un dict
+    # código -> "redeemed" | "already_used" | "unknown" | "invalid" (firma
+    # incorrecta). El UPDATE ... RETURNING hace que el canje sea atómico aunque
+    # otros procesos canjeen a la vez.
+    def use_codes(self, codes, category=None):
+        self._sync_index()
+        status = {}
+        candidates = []
+        for code in dict.fromkeys(codes):
+            if self.verify_code(code, category) is False:
+                status[code] = "invalid"
+            elif self._may_exist(code):
+                candidates.append(code)
+            else:
+                status[code] = "unknown"
+        if not candidates:
+            return status
+        used_date = int(time.time())
+        with self.conn:
+            for code in candidates:
+                self.c.execute("UPDATE codes SET used=1, used_date=? WHERE code=? AND used=0 RETURNING id",
+                               (used_date, code))
+                status[code] = "redeemed" if self.c.fetchone() else None
+            rest = [code for code in candidates if status[code] is None]
+            for i in range(0, len(rest), 500):
+                chunk = rest[i:i + 500]
+                self.c.execute(f"SELECT code FROM codes WHERE code IN ({','.join('?' * len(chunk))})", chunk)
+                for (code,) in self.c.fetchall():
+                    status[code] = "already_used"
+        for code in rest:
+            if status[code] is None:
+                status[code] = "already_used" if self._archived(code) else "unknown"
+        return status
+
+    def delete_code(self, code):
+        self._sync_index()
+        if not self._may_exist(code):
+            return False
+        self.c.execute("DELETE FROM codes WHERE code=?", (code,))
+        affected = self.c.rowcount
+        self.conn.commit()
+        if affected and self.index is not None:
+            self.index.discard(code)
+        return affected > 0
+
+    # Borra la tabla y la vuelve a crear en vez de borrar fila a fila, y si la
+    # base tiene auto_vacuum incremental devuelve las páginas libres al disco.
+    # Los ids siguen desde donde iban para que los listados por id no se confundan.
+    def delete_all_codes(self, include_archive=True):
+        conn = self.conn
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name='codes'").fetchone()
+            conn.execute("DROP TABLE codes")
+            conn.execute("CREATE TABLE codes " + CODES_TABLE)
+            _migrate_indexes(conn)
+            _add_lease_columns(conn)
+            _create_lease_indexes(conn)
+            conn.execute("DELETE FROM leases")
+            _create_change_triggers(conn)
+            conn.execute("UPDATE codes_changes SET count = count + 1 WHERE id = 0")
+            # El DROP se llevó los triggers del índice de subcadenas
+            if self.substring_search_enabled():
+                conn.execute("INSERT INTO codes_fts (codes_fts) VALUES ('delete-all')")
+                _create_substring_triggers(conn)
+            if seq is not None:
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('codes', ?)", seq)
+            if include_archive:
+                conn.execute(f"DELETE FROM {self.archive_table}")
+                conn.execute("DELETE FROM archived_hashes")
+        for schema in ("main", "archive") if self.archive_path and include_archive else ("main",):
+            if conn.execute(f"PRAGMA {schema}.auto_vacuum").fetchone()[0] == 2:
+                # execute() solo da un paso (libera una página); executescript la corre entera
+                conn.executescript(f"PRAGMA {schema}.incremental_vacuum;")
+        if self.index is not None:
+            self.build_index()
+
+    # Mueve a archivo los códigos canjeados hace más de older_than_days días, en
+    # transacciones de batch_size filas para no bloquear a los demás escritores.
+    # Devuelve cuántos movió.
+    def archive_used(self, older_than_days=30, batch_size=5000):
+        cutoff = int(time.time() - older_than_days * 86400)
+        archived_date = int(time.time())
+        conn = self.conn
+        total = 0
+        while True:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                rows = conn.execute("SELECT id, code, creation_date, used_date, category, metadata FROM codes "
+                                    "WHERE used=1 AND used_date < ? ORDER BY id LIMIT ?",
+                                    (cutoff, batch_size)).fetchall()
+                if not rows:
+                    break
+                conn.executemany(f"INSERT OR IGNORE INTO {self.archive_table} "
+                                 "(id, code, creation_date, used_date, category, metadata, archived_date) "
+                                 "VALUES (?, ?, ?, ?, ?, ?, ?)", [row + (archived_date,) for row in rows])
+                conn.executemany("INSERT OR IGNORE INTO archived_hashes (hash) VALUES (?)",
+                                 [(code_hash(row[1]),) for row in rows])
+                conn.executemany("DELETE FROM codes WHERE id=?", [(row[0],) for row in rows])
+            total += len(rows)
+            if len(rows) < batch_size:
+                break
+        return total
+
+    def list_codes(self, show_used=False):
+        if show_used:
+            self.c.execute("SELECT code, category, used FROM codes ORDER BY id DESC")
+        else:
+            self.c.execute("SELECT code, category, used FROM codes WHERE used=0 ORDER BY id DESC")
+        return self.c.fetchall()
+
+    # Importación en streaming desde CSV/JSONL (ver importer.import_codes)
+    def import_codes(self, path, **kwargs):
+        from .importer import import_codes
+        result = import_codes(self.db_path, path, busy_timeout=self.busy_timeout, **kwargs)
+        if self.index is not None:
+            self.build_index()
+        return result
+
+    # Exportación en streaming (ver export_codes); acepta los mismos filtros
+    def export_codes(self, path, fmt="csv", **kwargs):
+        from .export import export_codes
+        return export_codes(self.db_path, path, fmt=fmt, **kwargs)
+
+    def export_pdf(self, path, **kwargs):
+        from .export import export_codes_pdf
+        return export_codes_pdf(self.db_path, path, **kwargs)
+
+    # Paginación por clave: cada página empieza justo debajo del último id visto,
+    # así no hay OFFSET que recorra las filas anteriores
+    def list_codes_page(self, before_id=None, limit=500, show_used=True):
+        query = "SELECT id, code, category, used FROM codes WHERE 1=1"
+        params = []
+        if before_id is not None:
+            query += " AND id < ?"
+            params.append(before_id)
+        if not show_used:
+            query += " AND used=0"
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        return self.conn.execute(query, params).fetchall()
+
+    # Búsqueda por código con filtros (los de code_filters) y paginación por
+    # clave. `text` es un prefijo, resuelto como rango sobre el índice UNIQUE de
+    # code; con contains=True es una subcadena: con el índice de subcadenas usa
+    # FTS5 trigram y sin él (o con menos de 3 caracteres) recorre la tabla.
+    # Los prefijos salen ordenados por código y lo demás por id descendente;
+    # para la página siguiente se pasa after=la última fila de la anterior.
+    def search_codes(self, text="", contains=False, category=None, used=None, date_from=None, date_to=None,
+                     after=None, limit=100):
+        # Con texto manda el índice de code (o el FTS): los filtros solo descartan filas
+        where, params = code_filters(category, used, date_from, date_to, indexed=not text)
+        clauses = [where[len(" WHERE "):]] if where else []
+        source = "codes"
+        if text and not contains:
+            clauses.append("code >= ? AND code < ?")
+            params += [text, text[:-1] + chr(ord(text[-1]) + 1)]
+            if after is not None:
+                clauses.append("code > ?")
+                params.append(after[1])
+            order = "code"
+        else:
+            if text and len(text) >= 3 and self.substring_search_enabled():
+                source = "codes_fts CROSS JOIN codes ON codes.id = codes_fts.rowid"
+                clauses.append("codes_fts.code GLOB ?")
+                params.append(f"*{_glob_escape(text)}*")
+                key = "codes_fts.rowid"
+            else:
+                if text:
+                    clauses.append("instr(codes.code, ?) > 0")
+                    params.append(text)
+                key = "codes.id"
+            if after is not None:
+                clauses.append(f"{key} < ?")
+                params.append(after[0])
+            order = f"{key} DESC"
+        query = f"SELECT codes.id, codes.code, category, used FROM {source}"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        return self.conn.execute(f"{query} ORDER BY {order} LIMIT ?", params + [limit]).fetchall()
+
+    def substring_search_enabled(self):
+        return self.conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='codes_fts'").fetchone() \
+            is not None
+
+    # Crea (o borra) el índice de subcadenas. Ocupa unos 40 bytes por código y
+    # encarece un poco cada INSERT, por eso es opcional.
+    def enable_substring_search(self, enabled=True):
+        conn = self.conn
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            _drop_substring_index(conn)
+            if enabled:
+                _create_substring_index(conn)
+
+    def codes_since(self, after_id, show_used=True):
+        query = "SELECT id, code, category, used FROM codes WHERE id > ?"
+        if not show_used:
+            query += " AND used=0"
+        return self.conn.execute(query + " ORDER BY id DESC", (after_id,)).fetchall()
+
+    # --- Reparto por préstamos ---
+    # Varios frontends (bots, overlays) reparten códigos de la misma base: cada
+    # uno aparta un lote con lease_codes y lo entrega desde memoria, avisa con
+    # issue_codes de los que entregó y suelta el resto con release_lease. Lo que
+    # no confirmó antes de vencer el préstamo vuelve a estar libre. Solo se
+    # reparten códigos que nadie entregó todavía (los de generate_bulk y los
+    # importados): lo que devuelven generate_code, generate_codes y la reserva
+    # ya cuenta como entregado.
+
+    # Aparta hasta n códigos libres (sin usar, sin entregar y sin préstamo) para
+    # `consumer` durante ttl segundos. Devuelve un dict con lease, consumer,
+    # expires (epoch), ttl y codes; codes vacío si no queda ninguno libre.
+    def lease_codes(self, consumer, n, ttl=300, category=None):
+        now = int(time.time())
+        query = ("SELECT id FROM codes INDEXED BY idx_codes_free "
+                 "WHERE used=0 AND lease_id IS NULL AND issued_date IS NULL")
+        params = []
+        if category is not None:
+            query += " AND category=?"
+            params.append(category)
+        conn = self.conn
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._reclaim_expired(now)
+            lease_id = conn.execute("INSERT INTO leases (consumer, created, expires) VALUES (?, ?, ?)",
+                                    (consumer, now, now + ttl)).lastrowid
+            codes = [code for (code,) in conn.execute(
+                f"UPDATE codes SET lease_id=? WHERE id IN ({query} LIMIT ?) RETURNING code",
+                [lease_id] + params + [n]).fetchall()]
+            if not codes:
+                conn.execute("DELETE FROM leases WHERE id=?", (lease_id,))
+        return {"lease": lease_id, "consumer": consumer, "expires": now + ttl, "ttl": ttl, "codes": codes}
+
+    # Marca como entregados códigos del préstamo. Devuelve los que no se pudieron
+    # confirmar (no eran de ese préstamo o ya se reclamaron al vencer)
+    def issue_codes(self, lease_id, codes):
+        now = int(time.time())
+        codes = list(dict.fromkeys(codes))
+        confirmed = set()
+        with self.conn:
+            for i in range(0, len(codes), 500):
+                chunk = codes[i:i + 500]
+                self.c.execute(f"UPDATE codes SET lease_id=NULL, issued_date=? WHERE lease_id=? "
+                               f"AND code IN ({','.join('?' * len(chunk))}) RETURNING code", [now, lease_id] + chunk)
+                confirmed.update(code for (code,) in self.c.fetchall())
+        return [code for code in codes if code not in confirmed]
+
+    # Alarga el préstamo ttl segundos desde ahora. Mientras no se haya reclamado
+    # sigue siendo suyo aunque ya haya vencido. Devuelve el nuevo vencimiento o
+    # None si el préstamo ya no existe.
+    def renew_lease(self, lease_id, ttl=300):
+        expires = int(time.time()) + ttl
+        with self.conn:
+            updated = self.conn.execute("UPDATE leases SET expires=? WHERE id=?", (expires, lease_id)).rowcount
+        return expires if updated else None
+
+    # Cierra el préstamo: marca como entregados `issued` y libera los demás.
+    # Devuelve un dict con released (códigos liberados) y rejected (ver issue_codes).
+    def release_lease(self, lease_id, issued=()):
+        rejected = self.issue_codes(lease_id, issued) if issued else []
+        conn = self.conn
+        with conn:
+            released = conn.execute("UPDATE codes SET lease_id=NULL WHERE lease_id=?", (lease_id,)).rowcount
+            conn.execute("DELETE FROM leases WHERE id=?", (lease_id,))
+        return {"released": released, "rejected": rejected}
+
+    # lease_codes ya lo hace antes de apartar; esto sirve para limpiar a mano.
+    # Devuelve cuántos códigos volvieron a estar libres.
+    def reclaim_expired_leases(self):
+        conn = self.conn
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            return self._reclaim_expired(int(time.time()))
+
+    def _reclaim_expired(self, now):
+        reclaimed = self.conn.execute("UPDATE codes SET lease_id=NULL WHERE lease_id IN "
+                                      "(SELECT id FROM leases WHERE expires <= ?)", (now,)).rowcount
+        self.conn.execute("DELETE FROM leases WHERE expires <= ?", (now,))
+        return reclaimed
+
+    # Préstamos abiertos con los códigos que aún tienen sin confirmar
+    def leases(self):
+        return [{"lease": lease_id, "consumer": consumer, "expires": expires, "codes": count}
+                for lease_id, consumer, expires, count in self.conn.execute(
+                    "SELECT leases.id, consumer, expires, COUNT(codes.id) FROM leases "
+                    "LEFT JOIN codes ON codes.lease_id = leases.id GROUP BY leases.id ORDER BY leases.id")]
+
+    def stats(self):
+        total, used = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(used), 0) FROM codes").fetchone()
+        categories = {category: {"total": count, "used": cat_used} for category, count, cat_used in self.conn.execute(
+            "SELECT category, COUNT(*), COALESCE(SUM(used), 0) FROM codes GROUP BY category ORDER BY category")}
+        archived = self.conn.execute(f"SELECT COUNT(*) FROM {self.archive_table}").fetchone()[0]
+        leased = self.conn.execute("SELECT COUNT(*) FROM codes WHERE lease_id IS NOT NULL").fetchone()[0]
+        return {"total": total, "used": used, "unused": total - used, "archived": archived, "leased": leased,
+                "categories": categories}
+
+    # Cambia cuando otra conexión escribe en la base (no con las escrituras propias)
+    def data_version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    # Cambia con cada alta, canje o borrado en codes (también los de esta
+    # conexión), pero no con escrituras en otras tablas
+    def codes_version(self):
+        return self.conn.execute("SELECT (SELECT MAX(id) FROM codes), count FROM codes_changes").fetchone()
+
+    def close(self):
+        self._conn.close()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def __del__(self):
+        self._conn.close()
@@ -0,0 +1,186 @@
+# Exportación de la tabla de códigos a CSV, JSON Lines y PDF. reportlab solo
+# se importa al exportar un PDF.
+import os
+import csv
+import gzip
+import heapq
+import itertools
+import json
+import sqlite3
+from operator import itemgetter
+
+from .core import code_filters
+
+
+# --- Exportación en streaming ---
+# Las exportaciones abren su propia conexión (corren en otro hilo) y leen con
+# fetchmany, así la memoria no crece con el tamaño de la tabla.
+EXPORT_CHUNK = 5000
+
+
+def iter_code_chunks(conn, columns="code, category, used", chunk_size=EXPORT_CHUNK, order="id DESC", **filters):
+    where, params = code_filters(**filters)
+    cursor = conn.execute(f"SELECT {columns} FROM codes{where} ORDER BY {order}", params)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield rows
+
+
+def count_codes(conn, **filters):
+    where, params = code_filters(**filters)
+    return conn.execute(f"SELECT COUNT(*) FROM codes{where}", params).fetchone()[0]
+
+
+# db_path también puede ser la lista de shards de una ShardedRNG: se abre una
+# conexión por shard y se leen uno tras otro
+def _connect_all(db_path):
+    return [sqlite3.connect(path) for path in ([db_path] if isinstance(db_path, str) else db_path)]
+
+
+def _chunks(conns, columns="code, category, used", order="id DESC", **filters):
+    return itertools.chain.from_iterable(iter_code_chunks(conn, columns, order=order, **filters) for conn in conns)
+
+
+# fmt: "csv" o "jsonl". Con compress (o si la ruta termina en .gz) se escribe gzip.
+# progress(hechos, total) se llama por bloque; si cancel_event se activa, se
+# borra el archivo a medio escribir. Devuelve las filas exportadas o None.
+def export_codes(db_path, path, fmt="csv", compress=None, progress=None, cancel_event=None, **filters):
+    if compress is None:
+        compress = path.endswith(".gz")
+    conns = _connect_all(db_path)
+    tmp_path = path + ".part"
+    try:
+        total = sum(count_codes(conn, **filters) for conn in conns)
+        done = 0
+        if compress:
+            f = gzip.open(tmp_path, 'wt', compresslevel=6, encoding='utf-8', newline='')
+        else:
+            f = open(tmp_path, 'w', encoding='utf-8', newline='')
+        with f:
+            if fmt == "jsonl":
+                # Un solo encoder: json.dumps con argumentos crea uno nuevo por fila
+                encode = json.JSONEncoder(ensure_ascii=False).encode
+                columns = ("code, category, used, datetime(creation_date, 'unixepoch', 'localtime'), "
+                           "datetime(used_date, 'unixepoch', 'localtime')")
+                for rows in _chunks(conns, columns, **filters):
+                    if cancel_event is not None and cancel_event.is_set():
+                        break
+                    f.writelines(encode({"code": code, "category": category, "used": bool(used),
+                                         "creation_date": created, "used_date": used_date}) + "\n"
+                                 for code, category, used, created, used_date in rows)
+                    done += len(rows)
+                    if progress:
+                        progress(done, total)
+            else:
+                writer = csv.writer(f)
+                writer.writerow(["Código", "Categoría", "Usado"])
+                for rows in _chunks(conns, **filters):
+                    if cancel_event is not None and cancel_event.is_set():
+                        break
+                    writer.writerows((code, category, 'Sí' if used else 'No') for code, category, used in rows)
+                    done += len(rows)
+                    if progress:
+                        progress(done, total)
+        if cancel_event is not None and cancel_event.is_set():
+            os.remove(tmp_path)
+            return None
+        os.replace(tmp_path, path)
+        return done
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+# Exporta a PDF en una rejilla de varias columnas, página a página, con un
+# objeto de texto por columna en lugar de un drawString por código. Los códigos
+# usados llevan " *". Con by_category cada categoría abre una sección con título.
+# Devuelve los códigos escritos, o None si se canceló.
+def export_codes_pdf(db_path, path, by_category=False, font_size=8, progress=None, cancel_event=None, **filters):
+    from reportlab import rl_config
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    # Las páginas ya van comprimidas con zlib; el ASCII85 solo las hace más grandes y lentas
+    rl_config.useA85 = 0
+    width, height = letter
+    margin, gap = 30, 12
+    leading = font_size * 1.25
+    conns = _connect_all(db_path)
+    try:
+        total = sum(count_codes(conn, **filters) for conn in conns)
+        where, params = code_filters(**filters)
+        longest = max(conn.execute(f"SELECT MAX(length(code)) FROM codes{where}", params).fetchone()[0] or 1
+                      for conn in conns)
+        # Courier: cada carácter mide 0.6 * font_size
+        cell_width = (longest + 2) * 0.6 * font_size + gap
+        columns = max(1, int((width - 2 * margin + gap) // cell_width))
+        top = height - margin - 30
+        rows_per_column = int((top - margin) // leading) + 1
+
+        c = canvas.Canvas(path, pagesize=letter, pageCompression=1)
+        c.setTitle("Lista de Códigos Generados - Stivion Huzz RNG")
+        page = [[] for _ in range(columns)]
+        col = 0
+
+        def flush():
+            c.setFont("Helvetica-Bold", 12)
+            c.drawString(margin, height - margin - 10, "Lista de Códigos Generados - Stivion Huzz RNG  (* = usado)")
+            for i, lines in enumerate(page):
+                if not lines:
+                    continue
+                text = c.beginText(margin + i * cell_width, top)
+                text.setFont("Courier", font_size, leading)
+                for bold, line in lines:
+                    if bold:
+                        text.setFont("Courier-Bold", font_size, leading)
+                        text.textLine(line)
+                        text.setFont("Courier", font_size, leading)
+                    else:
+                        text.textLine(line)
+                c.drawText(text)
+            c.showPage()
+
+        def add(line, bold=False):
+            nonlocal col, page
+            if len(page[col]) == rows_per_column:
+                col += 1
+                if col == columns:
+                    flush()
+                    page = [[] for _ in range(columns)]
+                    col = 0
+            page[col].append((bold, line))
+
+        order = "category, id DESC" if by_category else "id DESC"
+        chunks = _chunks(conns, order=order, **filters)
+        if by_category and len(conns) > 1:
+            # Cada shard sale ordenado por categoría; se intercalan para que
+            # cada categoría quede en una sola sección
+            merged = heapq.merge(*(itertools.chain.from_iterable(iter_code_chunks(conn, order=order, **filters))
+                                   for conn in conns), key=itemgetter(1))
+            chunks = iter(lambda: list(itertools.islice(merged, EXPORT_CHUNK)), [])
+        current_category = None
+        done = 0
+        for rows in chunks:
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            for code, category, used in rows:
+                if by_category and category != current_category:
+                    current_category = category
+                    add(f"[{category}]", bold=True)
+                add(code + " *" if used else code)
+            done += len(rows)
+            if progress:
+                progress(done, total)
+        if any(page) or done == 0:
+            flush()
+        c.save()
+        return done
+    finally:
+        for conn in conns:
+            conn.close()
@@ -0,0 +1,807 @@
+import os
+import sqlite3
+import sys
+import threading
+import webbrowser
+
+from PySide6.QtWidgets import (
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
+    QLabel, QListView, QLineEdit, QMessageBox, QComboBox, QFileDialog, QProgressDialog
+)
+from PySide6.QtCore import (
+    Qt, QPropertyAnimation, QEasingCurve, QSize, QAbstractListModel, QModelIndex, QTimer,
+    QThread, Signal
+)
+from PySide6.QtGui import QFont
+
+from .core import PRESETS, StivionHuzzRNG
+from .export import export_codes, export_codes_pdf
+from .importer import import_codes
+from .metrics import Metrics
+from .reservoir import CodeReservoir
+from .webhook import WebhookDispatcher
+
+
+# --- Modelo de la lista de códigos ---
+# Carga las filas por páginas a medida que la vista las pide (canFetchMore /
+# fetchMore) y aplica los cambios propios fila a fila en vez de reconstruir todo.
+# Con una búsqueda activa las páginas las pide a `searcher` (el hilo de
+# búsqueda) y llegan después por add_results.
+class CodesListModel(QAbstractListModel):
+    PAGE_SIZE = 500
+
+    def __init__(self, rng, parent=None, searcher=None):
+        super().__init__(parent)
+        self.rng = rng
+        self.rows = []
+        self.exhausted = False
+        self.version = None
+        self.codes_version = None
+        self.searcher = searcher
+        self.search = None
+        self.generation = 0
+        self.loading = False
+        self.reset()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        _, code, category, used = self.rows[index.row()]
+        text = f"{code}  ({category})"
+        if used:
+            text += " [USED]"
+        return text
+
+    def code_at(self, row):
+        return self.rows[row][1]
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.search is not None:
+            if not self.loading:
+                self.loading = True
+                self.searcher(self.generation, dict(self.search, after=self.rows[-1] if self.rows else None,
+                                                    limit=self.PAGE_SIZE))
+            return
+        before_id = self.rows[-1][0] if self.rows else None
+        page = self.rng.list_codes_page(before_id=before_id, limit=self.PAGE_SIZE)
+        if len(page) < self.PAGE_SIZE:
+            self.exhausted = True
+        if not page:
+            return
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+        self.rows.extend(list(row) for row in page)
+        self.endInsertRows()
+
+    def reset(self):
+        self.beginResetModel()
+        self.rows = []
+        self.exhausted = False
+        self.loading = False
+        self.generation += 1
+        self.endResetModel()
+        self.version = self.rng.data_version()
+        self.codes_version = self.rng.codes_version()
+        self.fetchMore()
+
+    # search: argumentos de search_codes, o None para volver al listado completo
+    def set_search(self, search):
+        self.search = search
+        self.reset()
+
+    def add_results(self, generation, rows):
+        # Respuesta de una búsqueda que ya se reemplazó
+        if generation != self.generation:
+            return
+        self.loading = False
+        if len(rows) < self.PAGE_SIZE:
+            self.exhausted = True
+        if not rows:
+            return
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(rows) - 1)
+        self.rows.extend(list(row) for row in rows)
+        self.endInsertRows()
+
+    # Solo mira la base si otra conexión escribió desde la última vez, y solo
+    # relee la ventana ya cargada si cambió la tabla de códigos: el dispatcher
+    # del webhook y la reserva escriben en otras tablas desde sus conexiones
+    def refresh(self):
+        version = self.rng.data_version()
+        if version == self.version:
+            return
+        self.version = version
+        codes_version = self.rng.codes_version()
+        if codes_version == self.codes_version:
+            return
+        self.codes_version = codes_version
+        # Los resultados de una búsqueda no se releen solos (una búsqueda de
+        # subcadena sin índice recorre la tabla entera)
+        if self.search is not None:
+            return
+        if not self.rows:
+            self.reset()
+            return
+        rows = [list(row) for row in self.rng.codes_since(self.rows[-1][0] - 1)]
+        if rows != self.rows:
+            self.beginResetModel()
+            self.rows = rows
+            self.endResetModel()
+
+    # Después de una escritura propia (ya reflejada en las filas): si ninguna
+    # otra conexión escribió entretanto, el cambio de codes_version es solo
+    # nuestro y el próximo refresh no tiene que releer la ventana
+    def own_write_done(self):
+        if self.rng.data_version() == self.version:
+            self.codes_version = self.rng.codes_version()
+
+    def prepend_new(self):
+        if self.search is not None:
+            return
+        top_id = self.rows[0][0] if self.rows else 0
+        new_rows = self.rng.codes_since(top_id)
+        self.own_write_done()
+        if not new_rows:
+            return
+        if len(new_rows) > self.PAGE_SIZE:
+            self.reset()
+            return
+        self.beginInsertRows(QModelIndex(), 0, len(new_rows) - 1)
+        self.rows[:0] = [list(row) for row in new_rows]
+        self.endInsertRows()
+
+    def mark_used(self, codes):
+        codes = set(codes)
+        for row, values in enumerate(self.rows):
+            if values[1] in codes:
+                values[3] = 1
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.DisplayRole])
+        self.own_write_done()
+
+    def remove_codes(self, codes):
+        codes = set(codes)
+        # De abajo hacia arriba para que los índices pendientes no se muevan
+        for row in range(len(self.rows) - 1, -1, -1):
+            if self.rows[row][1] in codes:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.rows[row]
+                self.endRemoveRows()
+        self.own_write_done()
+
+
+# --- Hilo para exportaciones largas ---
+# Ejecuta job(progress, cancel_event) fuera del hilo de la interfaz y avisa por señales.
+class ExportWorker(QThread):
+    progress = Signal(int, int)
+    done = Signal(object)
+    failed = Signal(str)
+
+    def __init__(self, job, parent=None):
+        super().__init__(parent)
+        self.job = job
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            self.done.emit(self.job(self.progress.emit, self.cancel_event))
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+# --- Hilo de búsqueda ---
+# Corre una búsqueda a la vez y siempre la última pedida: si llega otra mientras
+# hay una consulta en curso, la corta con Connection.interrupt().
+class SearchWorker(QThread):
+    found = Signal(int, object)
+    failed = Signal(str)
+
+    def __init__(self, rng, parent=None):
+        super().__init__(parent)
+        self.rng = rng
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.pending = None
+        self.running = False
+        self.stopping = False
+        self.conn = None
+
+    def request(self, generation, search):
+        with self.lock:
+            self.pending = (generation, search)
+            if self.running:
+                self.conn.interrupt()
+        self.wakeup.set()
+
+    def stop(self):
+        with self.lock:
+            self.stopping = True
+            if self.running:
+                self.conn.interrupt()
+        self.wakeup.set()
+        self.wait(2000)
+
+    def run(self):
+        self.conn = self.rng.conn
+        while True:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            with self.lock:
+                if self.stopping:
+                    break
+                request, self.pending = self.pending, None
+                self.running = request is not None
+            if request is None:
+                continue
+            generation, search = request
+            try:
+                rows = self.rng.search_codes(**search)
+            except sqlite3.Error as e:
+                with self.lock:
+                    self.running = False
+                    interrupted = self.pending is not None or self.stopping
+                if not interrupted:
+                    self.failed.emit(str(e))
+                continue
+            with self.lock:
+                self.running = False
+            self.found.emit(generation, rows)
+        self.conn.close()
+
+
+# --- Botón animado ---
+class AnimatedButton(QPushButton):
+    def __init__(self, text):
+        super().__init__(text)
+        self.setCursor(Qt.PointingHandCursor)
+        self.setStyleSheet(self.default_style())
+        self.anim = QPropertyAnimation(self, b"minimumSize")
+        self.anim.setDuration(150)
+        self.anim.setEasingCurve(QEasingCurve.OutQuad)
+
+    def enterEvent(self, event):
+        self.anim.stop()
+        self.anim.setStartValue(self.size())
+        self.anim.setEndValue(QSize(self.width() + 10, self.height() + 5))
+        self.anim.start()
+        self.setStyleSheet(self.hover_style())
+        super().enterEvent(event)
+
+    def leaveEvent(self, event):
+        self.anim.stop()
+        self.anim.setStartValue(self.size())
+        self.anim.setEndValue(QSize(self.width() - 10, self.height() - 5))
+        self.anim.start()
+        self.setStyleSheet(self.default_style())
+        super().leaveEvent(event)
+
+    def default_style(self):
+        return """
+            QPushButton {
+                background-color: #8AA29E;
+                border-radius: 14px;
+                color: white;
+                font-size: 16px;
+                padding: 10px 18px;
+                font-weight: 600;
+                font-family: 'SF Pro Text', 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+                transition: all 0.3s ease;
+            }
+        """
+
+    def hover_style(self):
+        return """
+            QPushButton {
+                background-color: #718C88;
+                border-radius: 14px;
+                color: white;
+                font-size: 16px;
+                padding: 10px 18px;
+                font-weight: 700;
+                font-family: 'SF Pro Text', 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+                transition: all 0.3s ease;
+            }
+        """
+
+
+# --- GUI con funciones añadidas ---
+class StivionHuzzGUI(QWidget):
+    PRESETS = PRESETS
+
+    LANGUAGES = {
+        "Español": {
+            "title": "Stivion Huzz RNG - Códigos ",
+            "generate": "Generar Código",
+            "mark_used": "Marcar como usado",
+            "delete_codes": "Borrar código(s)",
+            "export_csv": "Exportar CSV",
+            "export_pdf": "Exportar PDF",
+            "import_codes": "Importar códigos",
+            "importing": "Importando códigos...",
+            "import_done": "{read} filas leídas: {imported} importadas, {duplicates} repetidas, {rejected} rechazadas.",
+            "import_cancelled": "Importación cancelada.",
+            "import_rejects": "Las filas rechazadas quedaron en {path}",
+            "dark_mode": "Modo Oscuro",
+            "discord": "Abrir Discord",
+            "webhook_success": "Código enviado al webhook correctamente.",
+            "webhook_error": "Error al enviar al webhook.",
+            "select_code": "Selecciona un código para marcar como usado.",
+            "used_success": "Código {code} marcado como usado.",
+            "used_error": "El código {code} ya está marcado o no existe.",
+            "length_error": "La longitud debe estar entre 4 y 50.",
+            "preset_applied": "Preset '{preset}' aplicado.",
+            "code_generated": "Código generado: {code} (Categoría: {category})",
+            "delete_none": "No hay código seleccionado. Se borrarán todos los códigos.",
+            "delete_confirm": "¿Estás seguro de que quieres borrar {count} código(s)?",
+            "delete_success": "Código(s) borrado(s) correctamente.",
+            "count_error": "La cantidad debe estar entre 1 y 1000000.",
+            "codes_generated": "{count} códigos generados (Categoría: {category})",
+            "exporting": "Exportando códigos...",
+            "cancel": "Cancelar",
+            "export_cancelled": "Exportación cancelada.",
+            "pdf_sections": "¿Agrupar los códigos por categoría?",
+            "used_bulk": "{redeemed} código(s) marcados como usados, {already_used} ya estaban usados, {unknown} no existen.",
+            "search": "Buscar código (prefijo, o *texto para buscar dentro)",
+        },
+        "English": {
+            "title": "Stivion Huzz RNG -  Codes",
+            "generate": "Generate Code",
+            "mark_used": "Mark as Used",
+            "delete_codes": "Delete Code(s)",
+            "export_csv": "Export CSV",
+            "export_pdf": "Export PDF",
+            "import_codes": "Import codes",
+            "importing": "Importing codes...",
+            "import_done": "{read} rows read: {imported} imported, {duplicates} duplicates, {rejected} rejected.",
+            "import_cancelled": "Import cancelled.",
+            "import_rejects": "Rejected rows were written to {path}",
+            "dark_mode": "Dark Mode",
+            "discord": "Open Discord",
+            "webhook_success": "Code sent to webhook successfully.",
+            "webhook_error": "Error sending to webhook.",
+            "select_code": "Select a code to mark as used.",
+            "used_success": "Code {code} marked as used.",
+            "used_error": "Code {code} is already used or does not exist.",
+            "length_error": "Length must be between 4 and 50.",
+            "preset_applied": "Preset '{preset}' applied.",
+            "code_generated": "Code generated: {code} (Category: {category})",
+            "delete_none": "No code selected. All codes will be deleted.",
+            "delete_confirm": "Are you sure you want to delete {count} code(s)?",
+            "delete_success": "Code(s) deleted successfully.",
+            "count_error": "Amount must be between 1 and 1000000.",
+            "codes_generated": "{count} codes generated (Category: {category})",
+            "exporting": "Exporting codes...",
+            "cancel": "Cancel",
+            "export_cancelled": "Export cancelled.",
+            "pdf_sections": "Group codes by category?",
+            "used_bulk": "{redeemed} code(s) marked as used, {already_used} were already used, {unknown} do not exist.",
+            "search": "Search code (prefix, or *text to search inside)",
+        }
+    }
+
+    DISCORD_URL = "https://discord.gg/qeE8hCGVgb"  # Cambia por tu URL real
+    # Métricas opcionales: STIVION_HUZZ_METRICS=ruta.prom (o .json) las escribe cada
+    # 10 s y al cerrar; STIVION_HUZZ_SLOW_QUERY_MS registra las consultas lentas
+    METRICS_PATH = os.environ.get("STIVION_HUZZ_METRICS")
+    SLOW_QUERY_MS = os.environ.get("STIVION_HUZZ_SLOW_QUERY_MS")
+    GUI_ACTIONS = ("generate_code", "mark_code_used", "delete_codes", "refresh_codes_list", "search_codes",
+                   "import_codes", "export_csv", "export_pdf")
+    MODEL_METHODS = ("reset", "refresh", "fetchMore", "prepend_new", "mark_used", "remove_codes", "add_results")
+    WEBHOOK_URL = "https://ptb.discord.com/api/webhooks/1211637693503508510/4VAK4vCIJBuTpitvQbOLECiK6_WRwEJ0x61hkB_GqmfTe6aoy0kKcfoGuoRi4iXf2ek2"  # Cambia por tu webhook real
+
+    def __init__(self, db_path="huzz_rng_codes.db"):
+        super().__init__()
+        self.metrics = None
+        if self.METRICS_PATH or self.SLOW_QUERY_MS:
+            self.metrics = Metrics(float(self.SLOW_QUERY_MS) if self.SLOW_QUERY_MS else None)
+            self.metrics.instrument(self, self.GUI_ACTIONS, "gui_")
+        # Modo concurrente: el dispatcher y la reserva escriben desde otros hilos
+        self.rng = StivionHuzzRNG(db_path, concurrent=True, metrics=self.metrics)
+        self.webhook = WebhookDispatcher(self.WEBHOOK_URL, self.rng.db_path, on_result=self.webhook_result,
+                                         metrics=self.metrics)
+        self.webhook.start()
+        # La categoría de la interfaz es el nombre del preset en minúsculas
+        self.reservoir = CodeReservoir(self.rng, {name: dict(preset, category=name.lower())
+                                                  for name, preset in self.PRESETS.items()})
+        self.reservoir.start()
+        self.dark_mode_enabled = False
+        self.current_language = "Español"
+        self.setWindowTitle(self.LANGUAGES[self.current_language]["title"])
+        self.setMinimumSize(700, 580)
+        self.setStyleSheet(self.light_style())
+        self.init_ui()
+        if self.metrics is not None:
+            self.metrics.instrument(self.codes_model, self.MODEL_METHODS, "gui_model_")
+            if self.METRICS_PATH:
+                self.metrics_timer = QTimer(self)
+                self.metrics_timer.timeout.connect(lambda: self.metrics.write(self.METRICS_PATH))
+                self.metrics_timer.start(10000)
+
+    # --- Estilos claro y oscuro ---
+    def light_style(self):
+        return """
+            QWidget {
+                background-color: #F3F6F4;
+                color: #2F3E46;
+                font-family: 'SF Pro Text', 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            }
+            QListView {
+                background-color: white;
+                border: 1px solid #B7B9B9;
+            }
+            QComboBox, QLineEdit {
+                background-color: white;
+                border: 1px solid #B7B9B9;
+                border-radius: 6px;
+                padding: 5px;
+            }
+        """
+
+    def dark_style(self):
+        return """
+            QWidget {
+                background-color: #2F3E46;
+                color: #D9D9D9;
+                font-family: 'SF Pro Text', 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            }
+            QListView {
+                background-color: #202E2E;
+                border: 1px solid #D9D9D9;
+            }
+            QComboBox, QLineEdit {
+                background-color: #202E2E;
+                border: 1px solid #D9D9D9;
+                border-radius: 6px;
+                padding: 5px;
+                color: #D9D9D9;
+            }
+        """
+
+    # --- UI ---
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        # Presets
+        presets_layout = QHBoxLayout()
+        self.combo_presets = QComboBox()
+        self.combo_presets.addItems(self.PRESETS.keys())
+        self.combo_presets.currentTextChanged.connect(self.apply_preset)
+        presets_layout.addWidget(QLabel("Preset:"))
+        presets_layout.addWidget(self.combo_presets)
+
+        # Configuración de código
+        config_layout = QHBoxLayout()
+        self.input_length = QLineEdit("12")
+        self.input_length.setMaximumWidth(50)
+        self.input_complexity = QComboBox()
+        self.input_complexity.addItems(["Baja (Solo números)", "Media (Mayúsculas + números)", "Alta (Todos los caracteres)"])
+        config_layout.addWidget(QLabel("Longitud:"))
+        config_layout.addWidget(self.input_length)
+        config_layout.addSpacing(20)
+        config_layout.addWidget(QLabel("Complejidad:"))
+        config_layout.addWidget(self.input_complexity)
+        self.input_count = QLineEdit("1")
+        self.input_count.setMaximumWidth(80)
+        config_layout.addSpacing(20)
+        config_layout.addWidget(QLabel("Cantidad:"))
+        config_layout.addWidget(self.input_count)
+
+        # Botones principales
+        buttons_layout = QHBoxLayout()
+        self.btn_generate = AnimatedButton(self.LANGUAGES[self.current_language]["generate"])
+        self.btn_generate.clicked.connect(self.generate_code)
+        self.btn_mark_used = AnimatedButton(self.LANGUAGES[self.current_language]["mark_used"])
+        self.btn_mark_used.clicked.connect(self.mark_code_used)
+        self.btn_delete = AnimatedButton(self.LANGUAGES[self.current_language]["delete_codes"])
+        self.btn_delete.clicked.connect(self.delete_codes)
+        buttons_layout.addWidget(self.btn_generate)
+        buttons_layout.addWidget(self.btn_mark_used)
+        buttons_layout.addWidget(self.btn_delete)
+
+        # Búsqueda: espera a que se deje de escribir y consulta en otro hilo
+        self.input_search = QLineEdit()
+        self.input_search.setPlaceholderText(self.LANGUAGES[self.current_language]["search"])
+        self.input_search.setClearButtonEnabled(True)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.search_codes)
+        self.input_search.textChanged.connect(lambda _: self.search_timer.start())
+        self.search_worker = SearchWorker(self.rng, self)
+        self.search_worker.failed.connect(lambda error: print(f"Error de búsqueda: {error}"))
+        self.search_worker.start()
+
+        # Lista de códigos
+        self.codes_model = CodesListModel(self.rng, self, searcher=self.search_worker.request)
+        self.search_worker.found.connect(self.codes_model.add_results)
+        self.list_codes = QListView()
+        self.list_codes.setUniformItemSizes(True)
+        self.list_codes.setSelectionMode(QListView.ExtendedSelection)
+        self.list_codes.setModel(self.codes_model)
+        # Detecta cambios hechos por otros procesos; si no hubo, no hace nada
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh_codes_list)
+        self.refresh_timer.start(2000)
+
+        # Exportar y más
+        export_layout = QHBoxLayout()
+        self.btn_import = AnimatedButton(self.LANGUAGES[self.current_language]["import_codes"])
+        self.btn_import.clicked.connect(self.import_codes)
+        self.btn_export_csv = AnimatedButton(self.LANGUAGES[self.current_language]["export_csv"])
+        self.btn_export_csv.clicked.connect(self.export_csv)
+        self.btn_export_pdf = AnimatedButton(self.LANGUAGES[self.current_language]["export_pdf"])
+        self.btn_export_pdf.clicked.connect(self.export_pdf)
+        self.btn_toggle_dark = AnimatedButton(self.LANGUAGES[self.current_language]["dark_mode"])
+        self.btn_toggle_dark.clicked.connect(self.toggle_dark_mode)
+        self.btn_open_discord = AnimatedButton(self.LANGUAGES[self.current_language]["discord"])
+        self.btn_open_discord.clicked.connect(self.open_discord)
+        export_layout.addWidget(self.btn_import)
+        export_layout.addWidget(self.btn_export_csv)
+        export_layout.addWidget(self.btn_export_pdf)
+        export_layout.addWidget(self.btn_toggle_dark)
+        export_layout.addWidget(self.btn_open_discord)
+
+        # Cambio de idioma
+        lang_layout = QHBoxLayout()
+        self.combo_language = QComboBox()
+        self.combo_language.addItems(self.LANGUAGES.keys())
+        self.combo_language.setCurrentText(self.current_language)
+        self.combo_language.currentTextChanged.connect(self.change_language)
+        lang_layout.addStretch()
+        lang_layout.addWidget(QLabel("Idioma:"))
+        lang_layout.addWidget(self.combo_language)
+
+        # Armado final
+        layout.addLayout(presets_layout)
+        layout.addLayout(config_layout)
+        layout.addLayout(buttons_layout)
+        layout.addWidget(self.input_search)
+        layout.addWidget(self.list_codes)
+        layout.addLayout(export_layout)
+        layout.addLayout(lang_layout)
+        self.setLayout(layout)
+
+    # --- Cambiar idioma ---
+    def change_language(self, lang):
+        self.current_language = lang
+        lang_dict = self.LANGUAGES[lang]
+        self.setWindowTitle(lang_dict["title"])
+        self.btn_generate.setText(lang_dict["generate"])
+        self.btn_mark_used.setText(lang_dict["mark_used"])
+        self.btn_delete.setText(lang_dict["delete_codes"])
+        self.btn_import.setText(lang_dict["import_codes"])
+        self.btn_export_csv.setText(lang_dict["export_csv"])
+        self.btn_export_pdf.setText(lang_dict["export_pdf"])
+        self.btn_toggle_dark.setText(lang_dict["dark_mode"])
+        self.btn_open_discord.setText(lang_dict["discord"])
+        self.input_search.setPlaceholderText(lang_dict["search"])
+
+    # --- Aplicar preset ---
+    def apply_preset(self, preset_name):
+        preset = self.PRESETS.get(preset_name)
+        if preset:
+            self.input_length.setText(str(preset["length"]))
+            self.input_complexity.setCurrentIndex(preset["complexity"] - 1)
+            QMessageBox.information(self, "Info", self.LANGUAGES[self.current_language]["preset_applied"].format(preset=preset_name))
+
+    # --- Generar código ---
+    def generate_code(self):
+        try:
+            length = int(self.input_length.text())
+            if length < 4 or length > 50:
+                raise ValueError
+        except ValueError:
+            QMessageBox.warning(self, "Error", self.LANGUAGES[self.current_language]["length_error"])
+            return
+        try:
+            count = int(self.input_count.text())
+            if count < 1 or count > 1000000:
+                raise ValueError
+        except ValueError:
+            QMessageBox.warning(self, "Error", self.LANGUAGES[self.current_language]["count_error"])
+            return
+        complexity = self.input_complexity.currentIndex() + 1
+        category = self.combo_presets.currentText().lower()
+        if count == 1:
+            preset = self.PRESETS.get(self.combo_presets.currentText())
+            if preset and preset["length"] == length and preset["complexity"] == complexity:
+                code_data = self.reservoir.claim(self.combo_presets.currentText())
+            else:
+                code_data = self.rng.generate_code(length=length, category=category, complexity=complexity)
+            self.codes_model.prepend_new()
+            QMessageBox.information(self, "Info", self.LANGUAGES[self.current_language]["code_generated"].format(code=code_data["code"], category=code_data["category"]))
+            self.send_code_to_webhook(code_data["code"])
+            return
+        try:
+            batch = self.rng.generate_codes(count, length=length, category=category, complexity=complexity)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        self.codes_model.prepend_new()
+        QMessageBox.information(self, "Info", self.LANGUAGES[self.current_language]["codes_generated"].format(count=len(batch), category=category))
+        self.webhook.enqueue(code_data["code"] for code_data in batch)
+
+    # --- Enviar código a webhook ---
+    def send_code_to_webhook(self, code):
+        self.webhook.enqueue([code])
+
+    # Se llama desde el hilo del dispatcher; solo deja constancia en consola
+    def webhook_result(self, ok, count):
+        if ok:
+            print(self.LANGUAGES[self.current_language]["webhook_success"])
+        else:
+            print(self.LANGUAGES[self.current_language]["webhook_error"])
+
+    # --- Marcar código(s) como usado(s) ---
+    def mark_code_used(self):
+        selected_rows = self.list_codes.selectionModel().selectedRows()
+        if not selected_rows:
+            QMessageBox.warning(self, "Error", self.LANGUAGES[self.current_language]["select_code"])
+            return
+        codes = [self.codes_model.code_at(index.row()) for index in selected_rows]
+        status = self.rng.use_codes(codes)
+        redeemed = [code for code in codes if status[code] == "redeemed"]
+        self.codes_model.mark_used(redeemed)
+        if len(codes) > 1:
+            QMessageBox.information(self, "Info", self.LANGUAGES[self.current_language]["used_bulk"].format(
+                redeemed=len(redeemed),
+                already_used=sum(1 for v in status.values() if v == "already_used"),
+                unknown=sum(1 for v in status.values() if v in ("unknown", "invalid"))))
+        elif redeemed:
+            QMessageBox.information(self, "Info", self.LANGUAGES[self.current_language]["used_success"].format(code=codes[0]))
+        else:
+            QMessageBox.warning(self, "Error", self.LANGUAGES[self.current_language]["used_error"].format(code=codes[0]))
+
+    # --- Borrar códigos ---
+    def delete_codes(self):
+        selected_rows = self.list_codes.selectionModel().selectedRows()
+        if not selected_rows:
+            confirm = QMessageBox.question(self, "Confirmar", self.LANGUAGES[self.current_language]["delete_none"],
+                                           QMessageBox.Yes | QMessageBox.No)
+            if confirm == QMessageBox.Yes:
+                self.rng.delete_all_codes()
+                self.codes_model.reset()
+                QMessageBox.information(self, "Info", self.LANGUAGES[self.current_language]["delete_success"])
+            return
+        codes = [self.codes_model.code_at(index.row()) for index in selected_rows]
+        confirm = QMessageBox.question(self, "Confirmar", self.LANGUAGES[self.current_language]["delete_confirm"].format(count=len(codes)),
+                                       QMessageBox.Yes | QMessageBox.No)
+        if confirm == QMessageBox.Yes:
+            for code in codes:
+                self.rng.delete_code(code)
+            self.codes_model.remove_codes(codes)
+            QMessageBox.information(self, "Info", self.LANGUAGES[self.current_language]["delete_success"])
+
+    # --- Buscar ---
+    # Texto normal: prefijo del código; con * delante: contiene ese texto
+    def search_codes(self):
+        text = self.input_search.text().strip()
+        if text.startswith("*"):
+            search = {"text": text[1:], "contains": True} if text[1:] else None
+        else:
+            search = {"text": text} if text else None
+        self.codes_model.set_search(search)
+
+    # --- Refrescar lista ---
+    def refresh_codes_list(self):
+        self.codes_model.refresh()
+
+    # --- Importar códigos ---
+    # Las filas sin categoría toman la del preset elegido; las rechazadas se
+    # anotan junto al archivo importado
+    def import_codes(self):
+        lang = self.LANGUAGES[self.current_language]
+        path, _ = QFileDialog.getOpenFileName(
+            self, lang["import_codes"], "",
+            "Códigos (*.csv *.csv.gz *.jsonl *.jsonl.gz);;Todos los archivos (*)")
+        if not path:
+            return
+        db_path = self.rng.db_path
+        category = self.combo_presets.currentText().lower()
+        rejects_path = path + ".rechazos.csv"
+
+        def message(result):
+            text = lang["import_done"].format(**result)
+            if result["cancelled"]:
+                text = lang["import_cancelled"] + " " + text
+            if result["rejected"]:
+                text += "\n" + lang["import_rejects"].format(path=rejects_path)
+            return text
+
+        self.run_worker(lambda progress, cancel_event: import_codes(
+            db_path, path, category=category, progress=progress, cancel_event=cancel_event,
+            rejects_path=rejects_path), lang["importing"], message, "Error importando")
+
+    # --- Exportar CSV ---
+    def export_csv(self):
+        path, selected = QFileDialog.getSaveFileName(
+            self, "Exportar CSV", "",
+            "CSV Files (*.csv);;CSV gzip (*.csv.gz);;JSON Lines (*.jsonl);;JSON Lines gzip (*.jsonl.gz)")
+        if not path:
+            return
+        fmt = "jsonl" if "JSON" in selected or path.lower().removesuffix(".gz").endswith(".jsonl") else "csv"
+        # export_codes comprime según la extensión: con un filtro gzip se la agrega
+        # si no se escribió, así el archivo no queda sin comprimir
+        if "gzip" in selected and not path.lower().endswith(".gz"):
+            path += ".gz"
+        db_path = self.rng.db_path
+        self.run_export(lambda progress, cancel_event: export_codes(
+            db_path, path, fmt=fmt, progress=progress, cancel_event=cancel_event), fmt.upper())
+
+    # Lanza la exportación en un ExportWorker con un diálogo de progreso cancelable
+    def run_export(self, job, label):
+        lang = self.LANGUAGES[self.current_language]
+        self.run_worker(job, lang["exporting"],
+                        lambda rows: lang["export_cancelled"] if rows is None else f"{label} exportado correctamente.",
+                        f"Error exportando {label}")
+
+    # job(progress, cancel_event) corre en un ExportWorker; message(resultado)
+    # arma el aviso del final y error encabeza el de un fallo
+    def run_worker(self, job, text, message, error):
+        lang = self.LANGUAGES[self.current_language]
+        dialog = QProgressDialog(text, lang["cancel"], 0, 100, self)
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(300)
+        worker = ExportWorker(job, self)
+        dialog.canceled.connect(worker.cancel)
+        worker.progress.connect(lambda done, total: dialog.setValue(done * 100 // total if total else 100))
+
+        def finished(result):
+            dialog.reset()
+            QMessageBox.information(self, "Info", message(result))
+
+        def failed(reason):
+            dialog.reset()
+            QMessageBox.warning(self, "Error", f"{error}: {reason}")
+
+        worker.done.connect(finished)
+        worker.failed.connect(failed)
+        worker.finished.connect(worker.deleteLater)
+        self.export_worker = worker
+        worker.start()
+
+    # --- Exportar PDF ---
+    def export_pdf(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Exportar PDF", "", "PDF Files (*.pdf)")
+        if not path:
+            return
+        by_category = QMessageBox.question(self, "PDF", self.LANGUAGES[self.current_language]["pdf_sections"],
+                                           QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes
+        db_path = self.rng.db_path
+        self.run_export(lambda progress, cancel_event: export_codes_pdf(
+            db_path, path, by_category=by_category, progress=progress, cancel_event=cancel_event), "PDF")
+
+    # --- Cambiar modo oscuro ---
+    def toggle_dark_mode(self):
+        self.dark_mode_enabled = not self.dark_mode_enabled
+        if self.dark_mode_enabled:
+            self.setStyleSheet(self.dark_style())
+        else:
+            self.setStyleSheet(self.light_style())
+
+
+    def closeEvent(self, event):
+        self.search_worker.stop()
+        self.reservoir.stop()
+        self.webhook.stop()
+        if self.metrics is not None and self.METRICS_PATH:
+            self.metrics.write(self.METRICS_PATH)
+        super().closeEvent(event)
+
+    # --- Abrir Discord ---
+    def open_discord(self):
+        webbrowser.open(self.DISCORD_URL)
+
+
+def main():
+    app = QApplication(sys.argv)
+    window = StivionHuzzGUI()
+    window.show()
+    sys.exit(app.exec())
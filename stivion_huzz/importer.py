@@ -0,0 +1,162 @@
+# Importación de códigos hechos por otros (CSV o JSON Lines, con o sin gzip).
+# El archivo se lee en streaming: cada bloque de filas válidas va a una tabla
+# temporal con executemany y de ahí a codes con un solo INSERT OR IGNORE ...
+# SELECT, así que la memoria no depende del tamaño del archivo y los repetidos
+# (contra la base, el archivo o los códigos archivados) los descarta SQLite.
+import csv
+import gzip
+import io
+import itertools
+import json
+import os
+import re
+import sqlite3
+import time
+
+from .core import code_hash
+
+IMPORT_CHUNK = 50_000
+MAX_CODE_LENGTH = 64
+CODE_COLUMNS = ("code", "código", "codigo")
+CATEGORY_COLUMNS = ("category", "categoría", "categoria")
+USED_COLUMNS = ("used", "usado")
+TRUE_VALUES = ("1", "true", "sí", "si", "yes", "y", "x", "usado", "used")
+# Sin espacios ni caracteres de control
+VALID_CODE = re.compile(r"[^\s\x00-\x1f\x7f-\x9f]+").fullmatch
+
+
+def _used(value):
+    if isinstance(value, str):
+        return 1 if value.strip().lower() in TRUE_VALUES else 0
+    return 1 if value else 0
+
+
+# Devuelve el motivo del rechazo o None si el código sirve
+def _check(code):
+    if not isinstance(code, str) or not code:
+        return "código vacío o no es texto"
+    if len(code) > MAX_CODE_LENGTH:
+        return f"más de {MAX_CODE_LENGTH} caracteres"
+    if not VALID_CODE(code):
+        return "espacios o caracteres de control"
+    return None
+
+
+def _column(header, names):
+    return next((i for i, name in enumerate(header) if name in names), None)
+
+
+# Genera (línea, código, categoría, usado, motivo de rechazo) por fila. Con
+# cabecera (la de export_codes sirve) se buscan las columnas por nombre; sin
+# ella se toma código, categoría y usado en ese orden.
+def _csv_rows(f, category):
+    reader = csv.reader(f)
+    first = next(reader, None)
+    if first is None:
+        return
+    header = [name.strip().lower() for name in first]
+    if _column(header, CODE_COLUMNS) is not None:
+        code_col = _column(header, CODE_COLUMNS)
+        category_col, used_col = _column(header, CATEGORY_COLUMNS), _column(header, USED_COLUMNS)
+        rows, line = reader, 1
+    else:
+        code_col, category_col, used_col = 0, 1, 2
+        rows, line = itertools.chain([first], reader), 0
+    for row in rows:
+        line += 1
+        if not any(row):
+            continue
+        code = row[code_col].strip() if code_col < len(row) else ""
+        row_category = row[category_col].strip() if category_col is not None and category_col < len(row) else ""
+        used = _used(row[used_col]) if used_col is not None and used_col < len(row) else 0
+        yield line, code, row_category or category, used, _check(code)
+
+
+def _jsonl_rows(f, category):
+    for line, text in enumerate(f, 1):
+        if not text.strip():
+            continue
+        try:
+            data = json.loads(text)
+        except ValueError:
+            yield line, text.strip()[:80], category, 0, "JSON inválido"
+            continue
+        if not isinstance(data, dict):
+            yield line, text.strip()[:80], category, 0, "se esperaba un objeto"
+            continue
+        code = data.get("code")
+        code = code.strip() if isinstance(code, str) else code
+        yield line, code, data.get("category") or category, _used(data.get("used")), _check(code)
+
+
+# fmt: "csv" o "jsonl" (si falta, sale de la extensión; .gz se descomprime).
+# Las filas rechazadas se cuentan y, con rejects_path, se escriben en un CSV
+# (línea, código, motivo). progress(bytes leídos, tamaño) se llama por bloque;
+# con cancel_event se corta al terminar el bloque en curso y lo ya importado
+# se queda. Devuelve un dict con read, imported, duplicates, rejected y cancelled.
+def import_codes(db_path, path, fmt=None, category="general", progress=None, cancel_event=None,
+                 rejects_path=None, chunk_size=IMPORT_CHUNK, busy_timeout=30000):
+    if fmt is None:
+        fmt = "jsonl" if path.lower().removesuffix(".gz").endswith((".jsonl", ".json")) else "csv"
+    total_bytes = os.path.getsize(path)
+    raw = open(path, "rb")
+    stream = gzip.GzipFile(fileobj=raw) if path.endswith(".gz") else raw
+    f = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="" if fmt == "csv" else None)
+    conn = sqlite3.connect(db_path, timeout=busy_timeout / 1000)
+    conn.execute(f"PRAGMA busy_timeout={int(busy_timeout)}")
+    conn.execute("CREATE TEMP TABLE import_stage (code TEXT, category TEXT, used INTEGER)")
+    # Sin códigos archivados no hace falta calcular el hash de cada fila
+    insert = '''INSERT OR IGNORE INTO codes (code, creation_date, used, used_date, category)
+                SELECT code, ?, used, CASE WHEN used THEN ? END, category FROM temp.import_stage'''
+    if conn.execute("SELECT 1 FROM archived_hashes LIMIT 1").fetchone():
+        conn.create_function("code_hash", 1, code_hash, deterministic=True)
+        insert += " WHERE NOT EXISTS (SELECT 1 FROM archived_hashes WHERE hash = code_hash(code))"
+    # En orden de código el índice UNIQUE se recorre una vez por bloque
+    insert += " ORDER BY code"
+    result = {"read": 0, "imported": 0, "duplicates": 0, "rejected": 0, "cancelled": False}
+    rejects_file = rejects = None
+
+    def flush(chunk):
+        now = int(time.time())
+        with conn:
+            conn.executemany("INSERT INTO temp.import_stage (code, category, used) VALUES (?, ?, ?)", chunk)
+            before = conn.total_changes
+            conn.execute(insert, (now, now))
+            imported = conn.total_changes - before
+            conn.execute("DELETE FROM temp.import_stage")
+        result["imported"] += imported
+        result["duplicates"] += len(chunk) - imported
+
+    try:
+        rows = _jsonl_rows(f, category) if fmt == "jsonl" else _csv_rows(f, category)
+        chunk = []
+        for line, code, row_category, used, reason in rows:
+            result["read"] += 1
+            if reason is not None:
+                result["rejected"] += 1
+                if rejects_path:
+                    if rejects is None:
+                        rejects_file = open(rejects_path, "w", encoding="utf-8", newline="")
+                        rejects = csv.writer(rejects_file)
+                        rejects.writerow(["Línea", "Código", "Motivo"])
+                    rejects.writerow([line, code, reason])
+                continue
+            chunk.append((code, row_category, used))
+            if len(chunk) == chunk_size:
+                flush(chunk)
+                chunk = []
+                if progress:
+                    progress(raw.tell(), total_bytes)
+                if cancel_event is not None and cancel_event.is_set():
+                    result["cancelled"] = True
+                    break
+        if chunk and not result["cancelled"]:
+            flush(chunk)
+        if progress and not result["cancelled"]:
+            progress(total_bytes, total_bytes)
+        return result
+    finally:
+        f.close()
+        conn.close()
+        if rejects_file is not None:
+            rejects_file.close()
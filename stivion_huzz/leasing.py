@@ -0,0 +1,156 @@
+# Lado del frontend del reparto por préstamos (ver StivionHuzzRNG.lease_codes).
+# CodeDispenser entrega códigos de un lote apartado, desde memoria, y confirma
+# en tandas los que entregó. Funciona igual sobre un StivionHuzzRNG local que
+# sobre un LeaseClient, que habla con service.LeaseServer por HTTP.
+# No se exporta desde stivion_huzz: from stivion_huzz.leasing import CodeDispenser.
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class CodeDispenser:
+    # source: StivionHuzzRNG o LeaseClient. Se aparta un lote de batch_size
+    # códigos y se pide otro cuando se acaba. Cuando al préstamo le quedan menos
+    # de `margin` segundos se confirma lo entregado y se alarga, así nunca se
+    # entrega un código que ya pudo volver a estar libre. Los entregados se
+    # confirman cada report_every códigos; conflicts cuenta los que el servidor
+    # no aceptó (el préstamo se había reclamado).
+    def __init__(self, source, consumer, batch_size=100, ttl=300, category=None, margin=30, report_every=50):
+        if margin >= ttl:
+            raise ValueError("El margen tiene que ser menor que la duración del préstamo")
+        self.source = source
+        self.consumer = consumer
+        self.batch_size = batch_size
+        self.ttl = ttl
+        self.category = category
+        self.margin = margin
+        self.report_every = report_every
+        self.lock = threading.Lock()
+        self.lease_id = None
+        self.deadline = 0
+        self.codes = []
+        self.issued = []
+        self.conflicts = 0
+
+    # Devuelve un código para entregar, o None si no queda ninguno libre
+    def next_code(self):
+        with self.lock:
+            if not self.codes or time.monotonic() >= self.deadline:
+                self._refill()
+                if not self.codes:
+                    return None
+            code = self.codes.pop()
+            self.issued.append(code)
+            if len(self.issued) >= self.report_every:
+                self._report()
+            return code
+
+    def flush(self):
+        with self.lock:
+            self._report()
+
+    # Confirma lo entregado y devuelve el resto del lote
+    def close(self):
+        with self.lock:
+            if self.lease_id is not None:
+                result = self.source.release_lease(self.lease_id, self.issued)
+                self.conflicts += len(result["rejected"])
+            self.lease_id = None
+            self.codes = []
+            self.issued = []
+
+    def _report(self):
+        if self.issued:
+            self.conflicts += len(self.source.issue_codes(self.lease_id, self.issued))
+            self.issued = []
+
+    def _refill(self):
+        if self.lease_id is not None:
+            if self.codes:
+                self._report()
+                start = time.monotonic()
+                if self.source.renew_lease(self.lease_id, self.ttl) is not None:
+                    self.deadline = start + self.ttl - self.margin
+                    return
+                self.codes = []
+            else:
+                self.conflicts += len(self.source.release_lease(self.lease_id, self.issued)["rejected"])
+                self.issued = []
+            self.lease_id = None
+        # El plazo se cuenta desde antes de pedir el lote: el reloj del servidor no hace falta
+        start = time.monotonic()
+        lease = self.source.lease_codes(self.consumer, self.batch_size, self.ttl, self.category)
+        if lease["codes"]:
+            self.lease_id = lease["lease"]
+            self.codes = lease["codes"][::-1]
+            self.deadline = start + self.ttl - self.margin
+
+
+# Cliente de service.LeaseServer con los mismos métodos que StivionHuzzRNG
+# (lease_codes, issue_codes, renew_lease, release_lease, use_codes, leases,
+# stats). Cada hilo mantiene su conexión HTTP abierta entre peticiones.
+class LeaseClient:
+    def __init__(self, url="http://127.0.0.1:8765", token=None, timeout=10):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/json"}
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+        self._local = threading.local()
+
+    def _request(self, method, path, body=None):
+        # Aquí y no arriba: http.client tarda en importarse y CodeDispenser no lo necesita
+        import http.client
+        data = json.dumps(body).encode() if body is not None else None
+        for attempt in range(2):
+            conn = getattr(self._local, "conn", None)
+            if conn is None:
+                conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                conn.request(method, path, data, self.headers)
+                res = conn.getresponse()
+                result = json.loads(res.read() or b"null")
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # El servidor pudo cerrar la conexión guardada: se reintenta una vez con otra
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+        if res.status >= 400:
+            message = result.get("error") if isinstance(result, dict) else result
+            if res.status == 404 and path.endswith("/renew"):
+                return None
+            raise ValueError(f"HTTP {res.status}: {message}")
+        return result
+
+    def lease_codes(self, consumer, n, ttl=300, category=None):
+        return self._request("POST", "/leases", {"consumer": consumer, "count": n, "ttl": ttl, "category": category})
+
+    def issue_codes(self, lease_id, codes):
+        return self._request("POST", f"/leases/{int(lease_id)}/issued", {"codes": list(codes)})["rejected"]
+
+    def renew_lease(self, lease_id, ttl=300):
+        result = self._request("POST", f"/leases/{int(lease_id)}/renew", {"ttl": ttl})
+        return result["expires"] if result is not None else None
+
+    def release_lease(self, lease_id, issued=()):
+        return self._request("POST", f"/leases/{int(lease_id)}/release", {"issued": list(issued)})
+
+    def use_codes(self, codes, category=None):
+        return self._request("POST", "/redeem", {"codes": list(codes), "category": category})
+
+    def leases(self):
+        return self._request("GET", "/leases")
+
+    def stats(self):
+        return self._request("GET", "/stats")
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,165 @@
+# Métricas de la capa de almacenamiento, del webhook y de la interfaz.
+#
+# Cuenta consultas y commits por operación (con el trace callback de sqlite3),
+# reintentos por colisión al generar y guarda histogramas de latencia. Se
+# exporta como texto de Prometheus (textfile collector) o como JSON.
+#
+# Desactivado no cuesta nada: instrument() reemplaza los métodos de una
+# instancia concreta, así que sin Metrics no hay envoltorio ni callback.
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+PREFIX = "stivion_huzz"
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RETRY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 100)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for le, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            yield le, total
+
+
+class Metrics:
+    # slow_query_ms: si se indica, se registra cada sentencia SQL que tarde más.
+    # El tiempo de una sentencia se mide hasta la siguiente sentencia de la misma
+    # conexión o el final de la operación, así que incluye leer sus filas.
+    def __init__(self, slow_query_ms=None, log=None):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.slow_query = slow_query_ms / 1000 if slow_query_ms is not None else None
+        self.log = log or (lambda message: print(message, file=sys.stderr))
+        self._local = threading.local()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    # Envuelve los métodos `names` de `obj` (solo esa instancia) para medir su
+    # latencia y atribuirles las consultas que hagan en este hilo
+    def instrument(self, obj, names, prefix=""):
+        for name in names:
+            setattr(obj, name, self._wrap(getattr(obj, name), prefix + name))
+
+    def _wrap(self, fn, operation):
+        local = self._local
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            outer = getattr(local, "operation", None)
+            local.operation = operation
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                self.inc("operation_errors_total", operation=operation)
+                raise
+            finally:
+                end = time.perf_counter()
+                if self.slow_query is not None:
+                    self._check_slow(end)
+                local.operation = outer
+                self.observe("operation_duration_seconds", end - start, operation=operation)
+        return wrapper
+
+    # Para sqlite3.Connection.set_trace_callback
+    def trace(self, sql):
+        if self.slow_query is not None:
+            now = time.perf_counter()
+            self._check_slow(now)
+            self._local.statement = (sql, now)
+        operation = getattr(self._local, "operation", None) or "other"
+        self.inc("commits_total" if sql.startswith("COMMIT") else "queries_total", operation=operation)
+
+    def _check_slow(self, now):
+        statement = getattr(self._local, "statement", None)
+        if statement is None:
+            return
+        self._local.statement = None
+        sql, start = statement
+        if now - start >= self.slow_query:
+            operation = getattr(self._local, "operation", None) or "other"
+            self.inc("slow_queries_total", operation=operation)
+            self.log(f"Consulta lenta ({(now - start) * 1000:.1f} ms) en {operation}: {' '.join(sql.split())[:500]}")
+
+    def snapshot(self):
+        with self.lock:
+            counters = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                counters.setdefault(name, []).append({"labels": dict(labels), "value": value})
+            histograms = {}
+            for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                histograms.setdefault(name, []).append({
+                    "labels": dict(labels),
+                    "buckets": {str(le): count for le, count in histogram.cumulative()},
+                    "sum": histogram.sum,
+                    "count": histogram.count
+                })
+        return {"counters": counters, "histograms": histograms}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        snapshot = self.snapshot()
+        lines = []
+        for name, series in snapshot["counters"].items():
+            lines.append(f"# TYPE {PREFIX}_{name} counter")
+            for item in series:
+                lines.append(f"{PREFIX}_{name}{_labels(item['labels'])} {item['value']}")
+        for name, series in snapshot["histograms"].items():
+            lines.append(f"# TYPE {PREFIX}_{name} histogram")
+            for item in series:
+                for le, count in item["buckets"].items():
+                    lines.append(f"{PREFIX}_{name}_bucket{_labels(dict(item['labels'], le=le))} {count}")
+                lines.append(f"{PREFIX}_{name}_sum{_labels(item['labels'])} {item['sum']}")
+                lines.append(f"{PREFIX}_{name}_count{_labels(item['labels'])} {item['count']}")
+        return "\n".join(lines) + "\n"
+
+    # .json escribe el snapshot en JSON; cualquier otra extensión (.prom) en
+    # formato de Prometheus. Se reemplaza el archivo de una vez para que el
+    # collector nunca lea uno a medio escribir.
+    def write(self, path):
+        text = self.to_json() if path.endswith(".json") else self.to_prometheus()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
@@ -0,0 +1,111 @@
+# Reserva de códigos listos por preset. Un hilo mantiene en la tabla code_pool
+# hasta `size` códigos únicos sin entregar por preset y la rellena cuando baja de
+# `low_water`; entregar uno es un DELETE ... RETURNING más un INSERT en codes,
+# con la misma latencia aunque haya un pico de pedidos.
+import threading
+import time
+
+from .core import PRESETS, StivionHuzzRNG, code_hash, format_epoch
+
+
+class CodeReservoir:
+    def __init__(self, rng, presets=PRESETS, size=1000, low_water=250, chunk=500, interval=1.0):
+        self.rng = rng
+        self.presets = presets
+        self.size = size
+        self.low_water = low_water
+        self.chunk = chunk
+        self.interval = interval
+        self.disabled = set()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+        if rng.metrics is not None:
+            rng.metrics.instrument(self, ("claim", "refill"), "reservoir_")
+
+    def start(self):
+        if self.thread is None:
+            self.stopping.clear()
+            self.thread = threading.Thread(target=self._run, name="code-reservoir", daemon=True)
+            self.thread.start()
+
+    def stop(self, timeout=5):
+        self.stopping.set()
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def levels(self):
+        return {preset: self.rng.conn.execute("SELECT COUNT(*) FROM code_pool WHERE preset=?",
+                                              (preset,)).fetchone()[0]
+                for preset in self.presets}
+
+    # Entrega un código del preset. Si la reserva está vacía lo genera en el momento.
+    def claim(self, preset):
+        params = self.presets[preset]
+        conn = self.rng.conn
+        while True:
+            with conn:
+                rows = conn.execute("DELETE FROM code_pool WHERE id = (SELECT id FROM code_pool WHERE preset=? "
+                                    "ORDER BY id LIMIT 1) RETURNING code, category", (preset,)).fetchall()
+                if not rows:
+                    break
+                code, category = rows[0]
+                created = int(time.time())
+                cur = conn.execute("INSERT OR IGNORE INTO codes (code, creation_date, category, issued_date) "
+                                   "SELECT ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM archived_hashes WHERE hash=?)",
+                                   (code, created, category, created, code_hash(code)))
+                # Si generate_code ya emitió ese mismo código, se descarta y se pasa al siguiente
+                if cur.rowcount == 0:
+                    continue
+            self.rng._index_add(code)
+            self.wakeup.set()
+            return {
+                "code": code,
+                "category": category,
+                "metadata": self.rng._metadata(code),
+                "creation_date": format_epoch(created)
+            }
+        self.wakeup.set()
+        return self.rng.generate_code(params["length"], params["category"], params["complexity"])
+
+    def refill(self, rng, preset):
+        params = self.presets[preset]
+        conn = rng.conn
+        count = conn.execute("SELECT COUNT(*) FROM code_pool WHERE preset=?", (preset,)).fetchone()[0]
+        if count >= self.low_water:
+            return 0
+        added = 0
+        while count + added < self.size and not self.stopping.is_set():
+            n = min(self.chunk, self.size - count - added)
+            candidates = rng._candidates(n, params["length"], params["category"], params["complexity"])
+            created = int(time.time())
+            # Transacciones cortas para no retener el lock de escritura frente a la interfaz
+            with conn:
+                for code in candidates:
+                    cur = conn.execute("INSERT OR IGNORE INTO code_pool (code, preset, category, creation_date) "
+                                       "SELECT ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM codes WHERE code=?) "
+                                       "AND NOT EXISTS (SELECT 1 FROM archived_hashes WHERE hash=?)",
+                                       (code, preset, params["category"], created, code, code_hash(code)))
+                    added += cur.rowcount
+        return added
+
+    def _run(self):
+        rng = StivionHuzzRNG(self.rng.db_path, generator=self.rng.generator, signer=self.rng.signer,
+                             concurrent=True, metrics=self.rng.metrics, archive_path=self.rng.archive_path)
+        try:
+            while not self.stopping.is_set():
+                for preset in self.presets:
+                    if preset in self.disabled or self.stopping.is_set():
+                        continue
+                    try:
+                        self.refill(rng, preset)
+                    except ValueError as e:
+                        # Preset imposible (p. ej. demasiado corto para llevar firma): se deja de rellenar
+                        print(f"Reserva '{preset}' desactivada: {e}")
+                        self.disabled.add(preset)
+                self.wakeup.wait(self.interval)
+                self.wakeup.clear()
+        finally:
+            rng.close()
@@ -0,0 +1,133 @@
+# Servicio HTTP de préstamos: un proceso dueño de la base y cualquier número
+# de frontends (en otros procesos u otras máquinas) que piden lotes con
+# leasing.LeaseClient. Solo librería estándar; JSON en el cuerpo y en la
+# respuesta. Rutas:
+#
+#   POST /leases                 {"consumer", "count", "ttl", "category"} -> préstamo
+#   GET  /leases                 préstamos abiertos
+#   POST /leases/<id>/issued     {"codes"} -> {"rejected"}
+#   POST /leases/<id>/renew      {"ttl"} -> {"expires"} (404 si ya no existe)
+#   POST /leases/<id>/release    {"issued"} -> {"released", "rejected"}
+#   POST /redeem                 {"codes", "category"} -> estado por código
+#   GET  /stats
+#
+# Con token, cada petición tiene que traer "Authorization: Bearer <token>".
+import hmac
+import http.server
+import json
+import re
+import sqlite3
+
+from .core import StivionHuzzRNG
+
+MAX_BODY = 1 << 20
+MAX_LEASE = 10_000
+MAX_TTL = 86_400
+LEASE_ROUTE = re.compile(r"/leases/(\d+)/(issued|renew|release)")
+
+
+class LeaseServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    # rng: un StivionHuzzRNG con concurrent=True (cada hilo usa su conexión)
+    def __init__(self, rng, host="127.0.0.1", port=8765, token=None):
+        if not rng.concurrent:
+            raise ValueError("El servicio necesita un StivionHuzzRNG con concurrent=True")
+        self.rng = rng
+        self.token = token
+        super().__init__((host, port), LeaseHandler)
+
+    @classmethod
+    def open(cls, db_path, host="127.0.0.1", port=8765, token=None, **kwargs):
+        return cls(StivionHuzzRNG(db_path, concurrent=True, **kwargs), host, port, token)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class LeaseHandler(http.server.BaseHTTPRequestHandler):
+    # HTTP/1.1: el cliente reutiliza la conexión entre peticiones. Sin Nagle:
+    # las cabeceras y el cuerpo van en dos write() y el segundo esperaba el ACK
+    # retrasado del cliente (unos 40 ms por petición)
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, *args):
+        pass
+
+    def _dispatch(self, method):
+        server = self.server
+        if server.token is not None:
+            auth = self.headers.get("Authorization", "")
+            if not hmac.compare_digest(auth.encode(), f"Bearer {server.token}".encode()):
+                # El cuerpo queda sin leer: la conexión no se puede reutilizar
+                self.close_connection = True
+                return self._reply(401, {"error": "token incorrecto"})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            self.close_connection = True
+            return self._reply(413, {"error": "cuerpo demasiado grande"})
+        try:
+            body = json.loads(self.rfile.read(length)) if length else {}
+            if not isinstance(body, dict):
+                raise ValueError("se esperaba un objeto JSON")
+            status, result = self._route(method, self.path.split("?", 1)[0], body)
+        except (ValueError, TypeError, KeyError) as e:
+            status, result = 400, {"error": str(e)}
+        except sqlite3.OperationalError as e:
+            # Base bloqueada más allá del busy_timeout: el cliente puede reintentar
+            status, result = 503, {"error": str(e)}
+        self._reply(status, result)
+
+    def _route(self, method, path, body):
+        rng = self.server.rng
+        if path == "/leases" and method == "POST":
+            count = int(body.get("count", 100))
+            ttl = int(body.get("ttl", 300))
+            if not 0 < count <= MAX_LEASE or not 0 < ttl <= MAX_TTL:
+                raise ValueError(f"count debe estar entre 1 y {MAX_LEASE} y ttl entre 1 y {MAX_TTL}")
+            return 200, rng.lease_codes(str(body["consumer"]), count, ttl, body.get("category"))
+        if path == "/leases" and method == "GET":
+            return 200, rng.leases()
+        match = LEASE_ROUTE.fullmatch(path)
+        if match and method == "POST":
+            lease_id, action = int(match.group(1)), match.group(2)
+            if action == "issued":
+                return 200, {"rejected": rng.issue_codes(lease_id, _codes(body, "codes"))}
+            if action == "release":
+                return 200, rng.release_lease(lease_id, _codes(body, "issued"))
+            ttl = int(body.get("ttl", 300))
+            if not 0 < ttl <= MAX_TTL:
+                raise ValueError(f"ttl debe estar entre 1 y {MAX_TTL}")
+            expires = rng.renew_lease(lease_id, ttl)
+            if expires is None:
+                return 404, {"error": "el préstamo no existe o ya venció"}
+            return 200, {"expires": expires, "ttl": ttl}
+        if path == "/redeem" and method == "POST":
+            return 200, rng.use_codes(_codes(body, "codes"), body.get("category"))
+        if path == "/stats" and method == "GET":
+            return 200, rng.stats()
+        return 404, {"error": "ruta desconocida"}
+
+    def _reply(self, status, result):
+        data = json.dumps(result, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _codes(body, key):
+    codes = body.get(key, [])
+    if not isinstance(codes, list) or not all(isinstance(code, str) for code in codes):
+        raise ValueError(f"{key} debe ser una lista de códigos")
+    return codes
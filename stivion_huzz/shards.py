@@ -0,0 +1,227 @@
+# Base repartida en shards y generación en paralelo con varios procesos.
+#
+# Cada shard es una base normal de StivionHuzzRNG (codes.shard0.db, ...) y cada
+# código vive en el shard que marca el hash de su cuerpo (shard_of; con firma,
+# el código sin la etiqueta, así el shard se sabe antes de firmar). Así la unicidad se
+# comprueba dentro de un solo shard y cada proceso escribe en los suyos sin
+# esperar el lock de escritura de los demás. ShardedRNG manda canjes y borrados
+# al shard del código y junta los listados, estadísticas y exportaciones.
+import heapq
+import os
+import time
+import zlib
+from operator import itemgetter
+
+from .core import CodeGenerator, StivionHuzzRNG, format_epoch
+
+# Códigos por shard y transacción al generar en paralelo
+GENERATE_CHUNK = 50_000
+
+
+def shard_of(code, shards):
+    return zlib.crc32(code.encode()) % shards
+
+
+def shard_paths(db_path, shards):
+    root, ext = os.path.splitext(db_path)
+    return [f"{root}.shard{i}{ext or '.db'}" for i in range(shards)]
+
+
+# Corre en un proceso del pool: genera cuerpos de candidatos, se queda con los
+# que caen en sus shards (paths: shard -> ruta) hasta cubrir quotas (shard ->
+# cantidad), firma solo esos y los inserta en transacciones de GENERATE_CHUNK
+# por shard. Devuelve los códigos
+# creados (ya entregados) o, sin return_codes, cuántos fueron (sin entregar). use_numpy es el del generador
+# del proceso padre (el generador en sí no se puede mandar a otro proceso).
+def _generate_worker(paths, quotas, shards, created, length, category, complexity, batch, signer,
+                     return_codes, busy_timeout, use_numpy=None):
+    generator = CodeGenerator(use_numpy=use_numpy)
+    rngs = {shard: StivionHuzzRNG(path, generator=generator, signer=signer, concurrent=True,
+                                  busy_timeout=busy_timeout)
+            for shard, path in paths.items()}
+    source = rngs[min(rngs)]
+    pending = dict(quotas)
+    codes = []
+    count = 0
+    try:
+        while any(pending.values()):
+            wanted = {shard: min(left, GENERATE_CHUNK) for shard, left in pending.items() if left}
+            buckets = {shard: [] for shard in wanted}
+            # Cada candidato cae en un shard cualquiera: con shards veces lo que
+            # le falta al shard más atrasado alcanza para todos en una vuelta
+            for body in set(source._bodies(max(wanted.values()) * shards, length, complexity, batch)):
+                shard = shard_of(body, shards)
+                bucket = buckets.get(shard)
+                if bucket is not None and len(bucket) < wanted[shard]:
+                    bucket.append(body)
+            for shard, bucket in buckets.items():
+                rng = rngs[shard]
+                with rng.conn:
+                    inserted = rng._insert_new(rng._sign(bucket, category), created, category, issued=return_codes)
+                pending[shard] -= len(inserted)
+                count += len(inserted)
+                if return_codes:
+                    codes.extend(inserted)
+        return codes if return_codes else count
+    finally:
+        for rng in rngs.values():
+            rng.close()
+
+
+class ShardedRNG:
+    # db_path es la ruta base: los shards van en db_path con .shardN antes de la
+    # extensión. El número de shards queda anotado en cada uno (tabla meta) y
+    # abrirlos con otro número es un error, porque cambiaría el shard de cada código.
+    def __init__(self, db_path='huzz_rng_codes.db', shards=4, signer=None, busy_timeout=30000, metrics=None,
+                 generator=None):
+        if shards < 1:
+            raise ValueError("Hace falta al menos un shard")
+        self.db_path = db_path
+        self.generator = generator or CodeGenerator()
+        self.paths = shard_paths(db_path, shards)
+        self.signer = signer
+        self.busy_timeout = busy_timeout
+        self.shards = []
+        for i, path in enumerate(self.paths):
+            rng = StivionHuzzRNG(path, generator=self.generator, signer=signer, concurrent=True,
+                                 busy_timeout=busy_timeout, metrics=metrics)
+            self.shards.append(rng)
+            layout = f"{i}/{shards}"
+            with rng.conn:
+                rng.conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('shard', ?)", (layout,))
+                stored = rng.conn.execute("SELECT value FROM meta WHERE key='shard'").fetchone()[0]
+            if stored != layout:
+                self.close()
+                raise ValueError(f"{path} es el shard {stored}, no el {layout}")
+
+    def shard_for(self, code):
+        return self.shards[self._shard_index(code)]
+
+    def _shard_index(self, code):
+        if self.signer is not None:
+            code = code[:-self.signer.tag_length]
+        return shard_of(code, len(self.shards))
+
+    def generate_code(self, length=12, category="general", complexity=3, batch=""):
+        created = int(time.time())
+        while True:
+            body = self.shards[0]._bodies(1, length, complexity, batch)[0]
+            rng = self.shards[shard_of(body, len(self.shards))]
+            code = rng._sign([body], category)[0]
+            with rng.conn:
+                if rng._insert_new([code], created, category):
+                    break
+        return {
+            "code": code,
+            "category": category,
+            "metadata": rng._metadata(code),
+            "creation_date": format_epoch(created)
+        }
+
+    # Como StivionHuzzRNG.generate_codes, repartiendo el trabajo en `workers`
+    # procesos (por defecto uno por shard, sin pasar de los CPUs). Los procesos
+    # se lanzan con spawn: el script que llama necesita su if __name__ == "__main__".
+    def generate_codes(self, n, length=12, category="general", complexity=3, batch="", workers=None):
+        created = int(time.time())
+        codes = self._generate(n, length, category, complexity, batch, workers, created, True)
+        creation_date = format_epoch(created)
+        metadata = self.shards[0]._metadata
+        return [{"code": code, "category": category, "metadata": metadata(code), "creation_date": creation_date}
+                for code in codes]
+
+    # Para tandas grandes: los códigos se quedan en los shards sin entregar (se
+    # sacan con export_codes) y solo se devuelve cuántos se crearon
+    def generate_bulk(self, n, length=12, category="general", complexity=3, batch="", workers=None):
+        return self._generate(n, length, category, complexity, batch, workers, int(time.time()), False)
+
+    def _generate(self, n, length, category, complexity, batch, workers, created, return_codes):
+        first = self.shards[0]
+        first._bodies(0, length, complexity, batch)  # valida el lote antes de lanzar procesos
+        keyspace = first._keyspace(length, complexity, batch)
+        if keyspace < 1 << 40:
+            existing = sum(rng.conn.execute("SELECT COUNT(*) FROM codes WHERE length(code)=?", (length,)).fetchone()[0]
+                           for rng in self.shards)
+            if existing + n > keyspace:
+                raise ValueError("No quedan suficientes códigos libres para esa longitud y complejidad")
+        shards = len(self.shards)
+        workers = max(1, min(workers or os.cpu_count() or 1, shards))
+        # El proceso w se queda con los shards w, w + workers, ...
+        jobs = []
+        for w in range(workers):
+            owned = range(w, shards, workers)
+            jobs.append(({shard: self.paths[shard] for shard in owned},
+                         {shard: n // shards + (shard < n % shards) for shard in owned},
+                         shards, created, length, category, complexity, batch, self.signer,
+                         return_codes, self.busy_timeout, self.generator.use_numpy))
+        if workers == 1:
+            results = [_generate_worker(*jobs[0])]
+        else:
+            # Se importan aquí: solo hacen falta con varios procesos y cargarlos
+            # al abrir los shards alarga el arranque de la línea de comandos
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # spawn: el proceso hijo no hereda conexiones SQLite ni hilos (la
+            # interfaz tiene varios) a medio usar
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                results = list(pool.map(_generate_worker, *zip(*jobs)))
+        if not return_codes:
+            return sum(results)
+        return [code for codes in results for code in codes]
+
+    def use_code(self, code, category=None):
+        return self.shard_for(code).use_code(code, category)
+
+    # Agrupa los códigos por shard y devuelve los estados en el orden recibido
+    def use_codes(self, codes, category=None):
+        groups = {}
+        for code in dict.fromkeys(codes):
+            groups.setdefault(self._shard_index(code), []).append(code)
+        status = {}
+        for shard, group in groups.items():
+            status.update(self.shards[shard].use_codes(group, category))
+        return {code: status[code] for code in dict.fromkeys(codes)}
+
+    def delete_code(self, code):
+        return self.shard_for(code).delete_code(code)
+
+    def delete_all_codes(self, include_archive=True):
+        for rng in self.shards:
+            rng.delete_all_codes(include_archive)
+
+    def archive_used(self, older_than_days=30, batch_size=5000):
+        return sum(rng.archive_used(older_than_days, batch_size) for rng in self.shards)
+
+    # Los ids de cada shard son independientes: los listados se intercalan por
+    # fecha de creación (de más nuevo a más viejo) sin cargar los shards enteros
+    def list_codes(self, show_used=False):
+        query = "SELECT creation_date, code, category, used FROM codes"
+        if not show_used:
+            query += " WHERE used=0"
+        cursors = [rng.conn.execute(query + " ORDER BY id DESC") for rng in self.shards]
+        return [row[1:] for row in heapq.merge(*cursors, key=itemgetter(0), reverse=True)]
+
+    def export_codes(self, path, fmt="csv", **kwargs):
+        from .export import export_codes
+        return export_codes(self.paths, path, fmt=fmt, **kwargs)
+
+    def export_pdf(self, path, **kwargs):
+        from .export import export_codes_pdf
+        return export_codes_pdf(self.paths, path, **kwargs)
+
+    def stats(self):
+        result = {"total": 0, "used": 0, "unused": 0, "archived": 0, "leased": 0, "categories": {}, "shards": []}
+        for rng in self.shards:
+            stats = rng.stats()
+            for key in ("total", "used", "unused", "archived", "leased"):
+                result[key] += stats[key]
+            for category, counts in stats["categories"].items():
+                merged = result["categories"].setdefault(category, {"total": 0, "used": 0})
+                merged["total"] += counts["total"]
+                merged["used"] += counts["used"]
+            result["shards"].append(stats["total"])
+        result["categories"] = dict(sorted(result["categories"].items()))
+        return result
+
+    def close(self):
+        for rng in self.shards:
+            rng.close()
@@ -0,0 +1,75 @@
+# Códigos firmados: los últimos tag_length caracteres son un HMAC-SHA256 del
+# resto del código (y, si se pide, de la categoría) con una clave local. Con la
+# clave, cualquier frontend puede descartar un código inventado o mal escrito
+# en microsegundos, sin consultar la base.
+import hashlib
+import hmac
+import os
+
+from .core import CodeGenerator
+
+
+class CodeSigner:
+    ALPHABETS = CodeGenerator.ALPHABETS
+
+    def __init__(self, secret, tag_length=6, bind_category=False):
+        if len(secret) < 16:
+            raise ValueError("La clave debe tener al menos 16 bytes")
+        if tag_length > 32:
+            raise ValueError("La etiqueta no puede pasar de 32 caracteres")
+        self.secret = secret
+        self.tag_length = tag_length
+        self.bind_category = bind_category
+        self.key_id = hashlib.sha256(secret).hexdigest()[:8]
+        # Cada byte del HMAC se convierte en un carácter con bytes.translate (byte % tamaño
+        # del alfabeto). El sesgo del módulo deja la probabilidad de acertar un carácter en
+        # como mucho ceil(256/k)/256 en vez de 1/k, despreciable con 6 o más caracteres.
+        self._tables = {complexity: bytes(chars[b % len(chars)] for b in range(256)).decode('latin-1')
+                        for complexity, chars in ((c, a.encode()) for c, a in self.ALPHABETS.items())}
+        self._charsets = [(complexity, frozenset(chars)) for complexity, chars in sorted(self.ALPHABETS.items())]
+
+    # Crea la clave la primera vez (solo legible por el usuario) y la reutiliza después
+    @classmethod
+    def from_file(cls, path="huzz_rng_secret.key", **kwargs):
+        if not os.path.exists(path):
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(os.urandom(32))
+        with open(path, "rb") as f:
+            return cls(f.read(), **kwargs)
+
+    # Los alfabetos están anidados (dígitos ⊂ mayúsculas+dígitos ⊂ todos), así que la
+    # etiqueta usa el más chico que contiene al cuerpo: sale del propio código y
+    # verificar cuesta un solo HMAC. None si el cuerpo tiene caracteres ajenos.
+    def _complexity_of(self, body):
+        chars = frozenset(body)
+        for complexity, charset in self._charsets:
+            if chars <= charset:
+                return complexity
+        return None
+
+    def _tag(self, body, category):
+        complexity = self._complexity_of(body)
+        if complexity is None:
+            return None
+        message = f"{category if self.bind_category else ''}\x00{body}".encode()
+        digest = hmac.digest(self.secret, message, "sha256")
+        return digest[:self.tag_length].decode('latin-1').translate(self._tables[complexity])
+
+    def sign(self, body, category=None):
+        tag = self._tag(body, category)
+        if tag is None:
+            raise ValueError("El código tiene caracteres fuera de los alfabetos")
+        return body + tag
+
+    # Sin category, un código firmado con bind_category no se puede comprobar:
+    # devuelve None (no se sabe) en vez de False
+    def verify(self, code, category=None):
+        if self.bind_category and category is None:
+            return None
+        if len(code) <= self.tag_length:
+            return False
+        tag = self._tag(code[:-self.tag_length], category)
+        # En bytes: compare_digest no acepta str con caracteres no ASCII (ñ, é
+        # en un código mal escrito)
+        return tag is not None and hmac.compare_digest(tag.encode(), code[-self.tag_length:].encode())
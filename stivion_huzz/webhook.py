@@ -0,0 +1,149 @@
+import sqlite3
+import threading
+import time
+
+import requests
+
+from .core import migrate
+
+
+# --- Envío de códigos al webhook en segundo plano ---
+# Los códigos se guardan primero en la tabla webhook_outbox (en la misma base),
+# así que si la app se cierra a medias se envían al volver a arrancar. Un hilo
+# los junta en mensajes de hasta MAX_CONTENT caracteres, los manda con una
+# requests.Session persistente y respeta el retry_after de los 429.
+class WebhookDispatcher:
+    MAX_CONTENT = 2000
+    BATCH_ROWS = 500
+
+    def __init__(self, url, db_path, timeout=10, flush_interval=1.0, max_backoff=60, on_result=None,
+                 metrics=None):
+        self.url = url
+        self.metrics = metrics
+        self.timeout = timeout
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.on_result = on_result
+        self.session = requests.Session()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        # La tabla webhook_outbox es parte del esquema (core.MIGRATIONS)
+        migrate(self.conn)
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.stopping.clear()
+            self.thread = threading.Thread(target=self._run, name="webhook-dispatcher", daemon=True)
+            self.thread.start()
+
+    def stop(self, timeout=5):
+        self.stopping.set()
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def enqueue(self, codes):
+        created_date = int(time.time())
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT INTO webhook_outbox (code, created_date) VALUES (?, ?)",
+                                  ((code, created_date) for code in codes))
+        self.wakeup.set()
+
+    def pending(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM webhook_outbox").fetchone()[0]
+
+    def _content(self, lines):
+        if len(lines) == 1:
+            return f"Nuevo código generado: {lines[0]}"
+        return "\n".join(["Nuevos códigos generados:"] + lines)
+
+    # Agrupa filas del outbox en mensajes que no pasen del límite de Discord
+    def _messages(self, rows):
+        messages, ids, lines = [], [], []
+        for row_id, code in rows:
+            line = f"`{code}`"
+            if lines and len(self._content(lines + [line])) > self.MAX_CONTENT:
+                messages.append((ids, self._content(lines)))
+                ids, lines = [], []
+            ids.append(row_id)
+            lines.append(line)
+        if lines:
+            messages.append((ids, self._content(lines)))
+        return messages
+
+    # Devuelve "sent", "dropped" o los segundos a esperar antes de reintentar
+    def _post(self, content, backoff):
+        try:
+            res = self.session.post(self.url, json={"content": content}, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"Webhook error: {e}")
+            return backoff
+        if res.status_code == 429:
+            return max(self._retry_after(res, backoff), 0.1)
+        if res.status_code >= 500:
+            return backoff
+        if res.status_code >= 300:
+            # Un 4xx distinto de 429 no se arregla reintentando
+            print(f"Webhook error: HTTP {res.status_code}")
+            return "dropped"
+        return "sent"
+
+    # El cuerpo del 429 puede no ser JSON, o no un objeto; entonces vale la
+    # cabecera Retry-After y, sin ella, el backoff
+    def _retry_after(self, res, backoff):
+        try:
+            body = res.json()
+            if isinstance(body, dict) and "retry_after" in body:
+                return float(body["retry_after"])
+        except (ValueError, TypeError):
+            pass
+        try:
+            return float(res.headers.get("Retry-After", backoff))
+        except (ValueError, TypeError):
+            return backoff
+
+    # Un error inesperado en una vuelta (p. ej. la base bloqueada más allá del
+    # timeout) no mata el hilo: se avisa, se espera el backoff y se sigue
+    def _run(self):
+        backoff = 1
+        while not self.stopping.is_set():
+            try:
+                backoff = self._step(backoff)
+            except Exception as e:
+                print(f"Webhook error: {e!r}")
+                self.stopping.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+        self.session.close()
+        self.conn.close()
+
+    # Una vuelta del hilo: manda lo pendiente y devuelve el backoff para la siguiente
+    def _step(self, backoff):
+        with self.lock:
+            rows = self.conn.execute("SELECT id, code FROM webhook_outbox ORDER BY id LIMIT ?",
+                                     (self.BATCH_ROWS,)).fetchall()
+        if not rows:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            return backoff
+        for ids, content in self._messages(rows):
+            if self.stopping.is_set():
+                break
+            start = time.perf_counter()
+            result = self._post(content, backoff)
+            if self.metrics is not None:
+                self.metrics.observe("webhook_request_duration_seconds", time.perf_counter() - start,
+                                     result=result if isinstance(result, str) else "retry")
+            if not isinstance(result, str):
+                self.stopping.wait(result)
+                return min(backoff * 2, self.max_backoff)
+            backoff = 1
+            with self.lock, self.conn:
+                self.conn.executemany("DELETE FROM webhook_outbox WHERE id=?", ((i,) for i in ids))
+            if self.on_result:
+                self.on_result(result == "sent", len(ids))
+        return backoff
@@ -0,0 +1,94 @@
+import sqlite3
+
+import pytest
+
+from stivion_huzz import StivionHuzzRNG
+from stivion_huzz.reservoir import CodeReservoir
+
+
+# Canjea los códigos y los deja con fecha de canje de hace 40 días
+def redeem_long_ago(rng, codes):
+    rng.use_codes(codes)
+    with rng.conn:
+        rng.conn.executemany("UPDATE codes SET used_date = used_date - 40 * 86400 WHERE code=?",
+                             [(code,) for code in codes])
+
+
+@pytest.fixture(params=["main", "attached"])
+def rng(request, tmp_path):
+    archive_path = str(tmp_path / "archive.db") if request.param == "attached" else None
+    rng = StivionHuzzRNG(str(tmp_path / "codes.db"), archive_path=archive_path)
+    yield rng
+    rng.close()
+
+
+def test_archive_moves_old_redeemed_codes(rng):
+    codes = [data["code"] for data in rng.generate_codes(10)]
+    redeem_long_ago(rng, codes[:6])
+    rng.use_code(codes[6])  # canjeado hoy: se queda
+
+    assert rng.archive_used(older_than_days=30, batch_size=4) == 6
+    assert rng.archive_used(older_than_days=30) == 0
+    remaining = {code for (code,) in rng.conn.execute("SELECT code FROM codes")}
+    assert remaining == set(codes[6:])
+    archived = {code for (code,) in rng.conn.execute(f"SELECT code FROM {rng.archive_table}")}
+    assert archived == set(codes[:6])
+    assert rng.stats()["archived"] == 6
+    if rng.archive_path:
+        with sqlite3.connect(rng.archive_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM codes_archive").fetchone()[0] == 6
+        assert rng.conn.execute("SELECT COUNT(*) FROM main.codes_archive").fetchone()[0] == 0
+
+
+def test_archived_codes_stay_redeemed(rng):
+    codes = [data["code"] for data in rng.generate_codes(3)]
+    redeem_long_ago(rng, codes[:2])
+    rng.archive_used()
+    assert rng.use_code(codes[0]) is False
+    assert rng.use_codes(codes) == {codes[0]: "already_used", codes[1]: "already_used", codes[2]: "redeemed"}
+
+
+def test_archived_codes_never_come_back(rng, tmp_path):
+    codes = [data["code"] for data in rng.generate_codes(3)]
+    redeem_long_ago(rng, codes)
+    rng.archive_used()
+
+    # Generación: los candidatos archivados se descartan y se vuelven a generar
+    candidates = rng._candidates
+    forced = [codes[0], codes[1]]
+    rng._candidates = lambda n, *args: [forced.pop(0)] if forced else candidates(n, *args)
+    assert rng.generate_code()["code"] != codes[0]
+    new = [data["code"] for data in rng.generate_codes(2)]
+    assert codes[1] not in new and len(new) == 2
+    rng._candidates = candidates
+
+    # Reserva: un código archivado que estaba en code_pool se salta
+    reservoir = CodeReservoir(rng, {"Test": {"length": 12, "complexity": 3, "category": "general"}})
+    with rng.conn:
+        rng.conn.execute("INSERT INTO code_pool (code, preset, category, creation_date) "
+                         "VALUES (?, 'Test', 'general', 0)", (codes[2],))
+    assert reservoir.claim("Test")["code"] != codes[2]
+
+    # Importación
+    path = tmp_path / "socio.csv"
+    path.write_text("code\n" + "\n".join(codes) + "\nNUEVO1234567\n", encoding="utf-8")
+    assert rng.import_codes(str(path))["imported"] == 1
+    in_codes = {code for (code,) in rng.conn.execute("SELECT code FROM codes")}
+    assert not in_codes & set(codes)
+
+
+def test_delete_all_can_keep_the_archive(rng):
+    codes = [data["code"] for data in rng.generate_codes(3)]
+    redeem_long_ago(rng, codes[:2])
+    rng.archive_used()
+
+    rng.delete_all_codes(include_archive=False)
+    assert rng.stats()["total"] == 0 and rng.stats()["archived"] == 2
+    assert rng.conn.execute("SELECT COUNT(*) FROM archived_hashes").fetchone()[0] == 2
+    assert rng.use_codes(codes[:2]) == {codes[0]: "already_used", codes[1]: "already_used"}
+
+    rng.delete_all_codes()
+    assert rng.stats()["archived"] == 0
+    assert rng.conn.execute("SELECT COUNT(*) FROM archived_hashes").fetchone()[0] == 0
+    assert rng.use_code(codes[0]) is False
+    assert rng.use_codes(codes[:1]) == {codes[0]: "unknown"}
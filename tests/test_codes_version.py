@@ -0,0 +1,33 @@
+import sqlite3
+
+from stivion_huzz import StivionHuzzRNG
+
+
+def test_codes_version_ignores_writes_to_other_tables(tmp_path):
+    rng = StivionHuzzRNG(str(tmp_path / "codes.db"))
+    code = rng.generate_code()["code"]
+    version = rng.codes_version()
+
+    rng.lease_codes("bot", 1)
+    with sqlite3.connect(rng.db_path) as other:
+        other.execute("INSERT INTO meta (key, value) VALUES ('scratch', '1')")
+    assert rng.codes_version() == version
+
+    rng.use_code(code)
+    assert rng.codes_version() != version
+
+
+def test_codes_version_sees_inserts_deletes_and_delete_all(tmp_path):
+    rng = StivionHuzzRNG(str(tmp_path / "codes.db"))
+    seen = [rng.codes_version()]
+    code = rng.generate_code()["code"]
+    seen.append(rng.codes_version())
+    rng.delete_code(code)
+    seen.append(rng.codes_version())
+    rng.generate_codes(3)
+    seen.append(rng.codes_version())
+    rng.delete_all_codes()
+    seen.append(rng.codes_version())
+    rng.use_codes([rng.generate_code()["code"]])
+    seen.append(rng.codes_version())
+    assert len(set(seen)) == len(seen)
@@ -0,0 +1,27 @@
+import gzip
+import json
+
+import pytest
+
+from stivion_huzz import StivionHuzzRNG
+
+
+@pytest.mark.parametrize("name", ["codes.csv", "codes.csv.gz", "exports.json.d/codes.csv", "codes.jsonl.bak.csv"])
+def test_csv_detected_by_extension(tmp_path, name):
+    path = tmp_path / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = "code,category\nAAAA1111,general\nBBBB2222,fortnite\n".encode()
+    path.write_bytes(gzip.compress(data) if name.endswith(".gz") else data)
+    rng = StivionHuzzRNG(str(tmp_path / "codes.db"))
+    assert rng.import_codes(str(path))["imported"] == 2
+    rng.close()
+
+
+@pytest.mark.parametrize("name", ["codes.jsonl", "codes.JSON", "codes.jsonl.gz"])
+def test_jsonl_detected_by_extension(tmp_path, name):
+    path = tmp_path / name
+    data = "\n".join(json.dumps({"code": code}) for code in ("AAAA1111", "BBBB2222")).encode()
+    path.write_bytes(gzip.compress(data) if name.endswith(".gz") else data)
+    rng = StivionHuzzRNG(str(tmp_path / "codes.db"))
+    assert rng.import_codes(str(path))["imported"] == 2
+    rng.close()
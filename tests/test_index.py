@@ -0,0 +1,49 @@
+import pytest
+
+from stivion_huzz import StivionHuzzRNG
+
+
+@pytest.mark.parametrize("mode", ["set", "bloom"])
+def test_index_sees_codes_written_by_another_connection(tmp_path, mode):
+    db = str(tmp_path / "codes.db")
+    indexed = StivionHuzzRNG(db, index=mode)
+    other = StivionHuzzRNG(db)
+    single = other.generate_code()["code"]
+    batch = [data["code"] for data in other.generate_codes(5)]
+
+    assert indexed.use_code(single) is True
+    assert indexed.use_codes(batch) == {code: "redeemed" for code in batch}
+    assert indexed.delete_code(batch[0]) is True
+
+
+def test_index_still_skips_sqlite_without_foreign_writes(tmp_path):
+    rng = StivionHuzzRNG(str(tmp_path / "codes.db"), index="set")
+    code = rng.generate_code()["code"]
+    assert rng.use_code(code) is True
+    assert rng.use_code("no-existe") is False
+    assert not rng._may_exist("no-existe")
+
+
+def test_index_refused_with_concurrent(tmp_path):
+    with pytest.raises(ValueError):
+        StivionHuzzRNG(str(tmp_path / "codes.db"), index="set", concurrent=True)
+
+
+@pytest.mark.parametrize("mode", ["set", "bloom"])
+def test_foreign_writes_only_fetch_new_rows(tmp_path, mode):
+    db = str(tmp_path / "codes.db")
+    indexed = StivionHuzzRNG(db, index=mode)
+    own = indexed.generate_code()["code"]
+    other = StivionHuzzRNG(db)
+    other.conn.execute("CREATE TABLE scratch (x)")
+    foreign = other.generate_code()["code"]
+
+    statements = []
+    indexed.conn.set_trace_callback(statements.append)
+    assert indexed.use_codes(["no-existe", foreign]) == {"no-existe": "unknown", foreign: "redeemed"}
+    assert sum("FROM codes WHERE id >" in sql for sql in statements) == 1
+    # Ya al día: un "no existe" vuelve a costar solo el PRAGMA
+    statements.clear()
+    assert indexed.use_code("tampoco") is False
+    assert statements == ["PRAGMA data_version"]
+    assert indexed.use_code(own) is True
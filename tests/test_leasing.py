@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+from stivion_huzz import StivionHuzzRNG
+from stivion_huzz.leasing import CodeDispenser, LeaseClient
+from stivion_huzz.reservoir import CodeReservoir
+from stivion_huzz.service import LeaseServer
+
+
+@pytest.fixture
+def rng(tmp_path):
+    rng = StivionHuzzRNG(str(tmp_path / "codes.db"), concurrent=True)
+    rng.generate_bulk(50, category="general")
+    rng.generate_bulk(10, category="fortnite")
+    yield rng
+    rng.close()
+
+
+def test_leases_never_overlap(rng):
+    first = rng.lease_codes("bot1", 20)
+    second = rng.lease_codes("bot2", 100)
+    assert len(first["codes"]) == 20 and len(second["codes"]) == 40
+    assert not set(first["codes"]) & set(second["codes"])
+    assert rng.lease_codes("bot3", 10)["codes"] == []
+    assert rng.stats()["leased"] == 60
+    assert [lease["codes"] for lease in rng.leases()] == [20, 40]
+
+
+def test_codes_handed_out_directly_are_never_leased(rng):
+    # Lo que entrega la ventana: la reserva, un código suelto y una tanda
+    reservoir = CodeReservoir(rng, {"Test": {"length": 10, "complexity": 2, "category": "general"}}, size=5)
+    reservoir.refill(rng, "Test")
+    handed_out = {reservoir.claim("Test")["code"] for _ in range(3)}
+    handed_out.add(rng.generate_code()["code"])
+    handed_out.update(data["code"] for data in rng.generate_codes(20))
+
+    leased = rng.lease_codes("bot", 1000)["codes"]
+    assert len(leased) == 60 and not handed_out & set(leased)
+    assert rng.conn.execute("SELECT COUNT(*) FROM codes WHERE issued_date IS NOT NULL").fetchone()[0] == 24
+
+
+def test_category_filter(rng):
+    lease = rng.lease_codes("bot", 100, category="fortnite")
+    categories = dict(rng.conn.execute("SELECT code, category FROM codes WHERE lease_id=?", (lease["lease"],)))
+    assert len(lease["codes"]) == 10 and set(categories.values()) == {"fortnite"}
+
+
+def test_issued_codes_are_never_leased_again(rng):
+    lease = rng.lease_codes("bot", 10)
+    assert rng.issue_codes(lease["lease"], lease["codes"][:4] + ["NOPE"]) == ["NOPE"]
+    result = rng.release_lease(lease["lease"], lease["codes"][4:6])
+    assert result == {"released": 4, "rejected": []}
+    handed_out = set(lease["codes"][:6])
+    again = rng.lease_codes("bot", 100)
+    assert len(again["codes"]) == 54 and not handed_out & set(again["codes"])
+    # Un préstamo cerrado ya no acepta confirmaciones
+    assert rng.issue_codes(lease["lease"], lease["codes"][6:]) == lease["codes"][6:]
+
+
+def test_expired_lease_is_reclaimed(rng):
+    lease = rng.lease_codes("bot", 10, ttl=1)
+    rng.issue_codes(lease["lease"], lease["codes"][:3])
+    time.sleep(1.1)
+    again = rng.lease_codes("other", 60)
+    assert set(lease["codes"][3:]) <= set(again["codes"])
+    assert not set(lease["codes"][:3]) & set(again["codes"])
+    assert rng.issue_codes(lease["lease"], lease["codes"][3:]) == lease["codes"][3:]
+    assert rng.renew_lease(lease["lease"]) is None
+
+
+def test_renewed_lease_survives_expiry(rng):
+    lease = rng.lease_codes("bot", 10, ttl=1)
+    assert rng.renew_lease(lease["lease"], 60) is not None
+    time.sleep(1.1)
+    assert rng.reclaim_expired_leases() == 0
+    assert rng.issue_codes(lease["lease"], lease["codes"]) == []
+
+
+def test_dispenser_hands_out_each_code_once(rng):
+    dispensers = [CodeDispenser(rng, f"bot{i}", batch_size=7, ttl=60, margin=10, report_every=3) for i in range(3)]
+    handed_out = []
+    while True:
+        codes = [dispenser.next_code() for dispenser in dispensers]
+        handed_out += [code for code in codes if code is not None]
+        if codes == [None] * 3:
+            break
+    for dispenser in dispensers:
+        dispenser.close()
+        assert dispenser.conflicts == 0
+    assert len(handed_out) == len(set(handed_out)) == 60
+    assert rng.conn.execute("SELECT COUNT(*) FROM codes WHERE issued_date IS NOT NULL").fetchone()[0] == 60
+    assert rng.leases() == []
+
+
+def test_service_round_trip(rng):
+    server = LeaseServer(rng, port=0, token="secreto")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = LeaseClient(server.url, token="secreto")
+    try:
+        dispenser = CodeDispenser(client, "overlay", batch_size=25, ttl=60, margin=10)
+        codes = [dispenser.next_code() for _ in range(30)]
+        dispenser.close()
+        assert len(set(codes)) == 30 and dispenser.conflicts == 0
+        assert client.stats()["leased"] == 0
+        assert client.use_codes(codes[:2]) == {codes[0]: "redeemed", codes[1]: "redeemed"}
+        with pytest.raises(ValueError, match="HTTP 401"):
+            LeaseClient(server.url, token="otro").leases()
+        with pytest.raises(ValueError, match="HTTP 400"):
+            client.lease_codes("overlay", 0)
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
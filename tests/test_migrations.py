@@ -0,0 +1,99 @@
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+
+from stivion_huzz import StivionHuzzRNG
+from stivion_huzz.core import SCHEMA_VERSION, _migrate_base
+
+
+def standard_metadata(code):
+    return str({"generator": "Stivion Huzz RNG Pro", "version": "1.0",
+                "signature": hashlib.sha256(code.encode()).hexdigest()})
+
+
+# Base como la dejaba el script original: user_version 0, fechas en texto
+# (hora local) y metadata como repr de dict
+def seed_baseline(path):
+    conn = sqlite3.connect(path)
+    _migrate_base(conn)
+    rows = [
+        ("AAAA1111", "2026-01-02 03:04:05", 0, None, "general", standard_metadata("AAAA1111")),
+        ("BBBB2222", "2026-01-02 03:04:06", 1, "2026-02-03 10:00:00", "fortnite", standard_metadata("BBBB2222")),
+        ("CCCC3333", "2026-01-02 03:04:07", None, None, "general",
+         str({"generator": "Stivion Huzz RNG Pro", "version": "1.0", "signature": "x", "note": "manual"})),
+        ("DDDD4444", "2026-01-02 03:04:08", 0, None, "general", "no es un dict"),
+    ]
+    conn.executemany("INSERT INTO codes (code, creation_date, used, used_date, category, metadata) "
+                     "VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def epoch(text):
+    return int(datetime.strptime(text, "%Y-%m-%d %H:%M:%S").timestamp())
+
+
+def test_baseline_database_is_migrated(tmp_path):
+    db = str(tmp_path / "codes.db")
+    seed_baseline(db)
+    rng = StivionHuzzRNG(db)
+    conn = rng.conn
+
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    rows = {code: rest for code, *rest in conn.execute(
+        "SELECT code, id, creation_date, used, used_date, category, metadata FROM codes")}
+    assert rows["AAAA1111"] == [1, epoch("2026-01-02 03:04:05"), 0, None, "general", None]
+    assert rows["BBBB2222"] == [2, epoch("2026-01-02 03:04:06"), 1, epoch("2026-02-03 10:00:00"), "fortnite", None]
+    assert rows["CCCC3333"][2] == 0
+    assert json.loads(rows["CCCC3333"][5]) == {"note": "manual"}
+    assert json.loads(rows["DDDD4444"][5]) == {"raw": "no es un dict"}
+    assert dict(conn.execute("SELECT key, value FROM meta")) == {"generator": "Stivion Huzz RNG Pro", "version": "1.0"}
+
+    indexes = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='index' "
+                                                "AND tbl_name='codes' AND sql IS NOT NULL")}
+    assert indexes == {"idx_codes_used_id", "idx_codes_category_used", "idx_codes_free", "idx_codes_lease"}
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert {"code_pool", "codes_archive", "archived_hashes", "leases", "codes_changes", "webhook_outbox"} <= tables
+
+    # Las columnas de epoch son enteros, no texto
+    assert conn.execute("SELECT typeof(creation_date), typeof(used_date) FROM codes "
+                        "WHERE code='BBBB2222'").fetchone() == ("integer", "integer")
+    # Los códigos de antes del reparto por préstamos ya se entregaron
+    assert rng.lease_codes("bot", 10)["codes"] == []
+    assert rng.use_code("AAAA1111") is True
+    assert rng.use_code("BBBB2222") is False
+    assert rng.generate_code()["code"] not in rows
+    rng.close()
+
+
+def test_migration_runs_once(tmp_path):
+    db = str(tmp_path / "codes.db")
+    seed_baseline(db)
+    StivionHuzzRNG(db).close()
+    rng = StivionHuzzRNG(db)
+    assert rng.conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    assert rng.conn.execute("SELECT COUNT(*) FROM codes").fetchone()[0] == 4
+    assert rng.list_codes_page(limit=10)[0][0] == 4
+    rng.close()
+
+
+def test_outbox_created_by_old_dispatcher_is_migrated(tmp_path):
+    db = str(tmp_path / "codes.db")
+    seed_baseline(db)
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE webhook_outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, code TEXT, created_date TEXT)")
+    conn.execute("INSERT INTO webhook_outbox (id, code, created_date) VALUES (7, 'AAAA1111', '2026-01-02 03:04:05')")
+    conn.commit()
+    conn.close()
+    rng = StivionHuzzRNG(db)
+    assert rng.conn.execute("SELECT id, code, created_date FROM webhook_outbox").fetchall() == [
+        (7, "AAAA1111", epoch("2026-01-02 03:04:05"))]
+    rng.close()
+
+
+def test_new_database_starts_at_current_version(tmp_path):
+    rng = StivionHuzzRNG(str(tmp_path / "codes.db"))
+    assert rng.conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    assert rng.conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    rng.close()
@@ -0,0 +1,50 @@
+import threading
+from collections import Counter
+
+import pytest
+
+from stivion_huzz import StivionHuzzRNG
+
+
+@pytest.mark.parametrize("index", [None, "set"])
+def test_use_codes_statuses(tmp_path, index):
+    rng = StivionHuzzRNG(str(tmp_path / "codes.db"), index=index)
+    codes = [data["code"] for data in rng.generate_codes(4)]
+    assert rng.use_code(codes[0]) is True
+
+    status = rng.use_codes([codes[1], codes[0], "NO-EXISTE", codes[1], codes[2]])
+    assert status == {codes[1]: "redeemed", codes[0]: "already_used", "NO-EXISTE": "unknown",
+                      codes[2]: "redeemed"}
+    assert rng.use_codes([]) == {}
+    assert rng.use_codes(codes) == {codes[0]: "already_used", codes[1]: "already_used",
+                                    codes[2]: "already_used", codes[3]: "redeemed"}
+    used = rng.conn.execute("SELECT COUNT(*) FROM codes WHERE used=1 AND used_date IS NOT NULL").fetchone()[0]
+    assert used == 4
+    rng.close()
+
+
+def test_concurrent_redemption_claims_each_code_once(tmp_path):
+    rng = StivionHuzzRNG(str(tmp_path / "codes.db"), concurrent=True)
+    codes = [data["code"] for data in rng.generate_codes(400)]
+    redeemed = Counter()
+    lock = threading.Lock()
+    barrier = threading.Barrier(4)
+
+    # Cada hilo canjea una ventana de 200 que se pisa con la de los vecinos
+    def worker(start):
+        barrier.wait()
+        mine = [codes[(start + i) % len(codes)] for i in range(200)]
+        for i in range(0, len(mine), 50):
+            status = rng.use_codes(mine[i:i + 50])
+            with lock:
+                redeemed.update(code for code, result in status.items() if result == "redeemed")
+            assert set(status.values()) <= {"redeemed", "already_used"}
+
+    threads = [threading.Thread(target=worker, args=(start,)) for start in range(0, 400, 100)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert redeemed == Counter(codes)
+    assert rng.stats()["used"] == 400
+    rng.close()
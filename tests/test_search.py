@@ -0,0 +1,71 @@
+import pytest
+
+from stivion_huzz import StivionHuzzRNG
+
+SPECIAL = ["AB*CD[12?XYZ", "ZZ[1]ABCDEF", "Q?Q*Q[Q", "PLAIN123", "AB*CDxx"]
+
+
+def search_all(rng, limit=7, **kwargs):
+    rows, after = [], None
+    while True:
+        page = rng.search_codes(after=after, limit=limit, **kwargs)
+        rows += page
+        if len(page) < limit:
+            return rows
+        after = page[-1]
+
+
+@pytest.fixture(params=[False, True], ids=["scan", "fts"])
+def rng(request, tmp_path):
+    rng = StivionHuzzRNG(str(tmp_path / "codes.db"))
+    if request.param:
+        rng.enable_substring_search()
+    rng.generate_codes(150, length=8, complexity=2, category="a")
+    rng.generate_codes(150, length=8, complexity=3, category="b")
+    with rng.conn:
+        rng.conn.executemany("INSERT INTO codes (code, creation_date, category) VALUES (?, 0, 'b')",
+                             [(code,) for code in SPECIAL])
+    rng.use_codes([code for (code,) in rng.conn.execute("SELECT code FROM codes WHERE id % 3 = 0")])
+    yield rng
+    rng.close()
+
+
+def all_rows(rng):
+    return rng.conn.execute("SELECT id, code, category, used FROM codes").fetchall()
+
+
+@pytest.mark.parametrize("text", ["A", "AB", "7", "Q?"])
+def test_prefix_search_pages(rng, text):
+    expected = sorted((row for row in all_rows(rng) if row[1].startswith(text)), key=lambda row: row[1])
+    assert search_all(rng, text=text) == expected
+    filtered = [row for row in expected if row[2] == "b" and not row[3]]
+    assert search_all(rng, limit=3, text=text, category="b", used=False) == filtered
+
+
+@pytest.mark.parametrize("text", ["A", "1", "*C", "[1", "?X", "[1]", "*CD[", "D[12?", "CD"])
+def test_contains_search_pages(rng, text):
+    expected = sorted((row for row in all_rows(rng) if text in row[1]), key=lambda row: -row[0])
+    assert search_all(rng, text=text, contains=True) == expected
+    used = [row for row in expected if row[3]]
+    assert search_all(rng, limit=2, text=text, contains=True, used=True) == used
+
+
+def test_empty_text_lists_everything(rng):
+    expected = sorted(all_rows(rng), key=lambda row: -row[0])
+    assert search_all(rng, limit=50) == expected
+
+
+def test_fts_triggers_survive_delete_all(tmp_path):
+    rng = StivionHuzzRNG(str(tmp_path / "codes.db"))
+    rng.enable_substring_search()
+    with rng.conn:
+        rng.conn.execute("INSERT INTO codes (code, creation_date) VALUES ('OLDCODE123', 0)")
+    rng.delete_all_codes()
+    assert rng.substring_search_enabled()
+    with rng.conn:
+        rng.conn.execute("INSERT INTO codes (code, creation_date) VALUES ('NEWCODE456', 0)")
+    assert [row[1] for row in rng.search_codes("CODE", contains=True)] == ["NEWCODE456"]
+    assert rng.search_codes("OLDC", contains=True) == []
+    rng.delete_code("NEWCODE456")
+    assert rng.search_codes("CODE", contains=True) == []
+    rng.close()
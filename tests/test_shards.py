@@ -0,0 +1,31 @@
+from stivion_huzz import CodeSigner
+from stivion_huzz.shards import ShardedRNG
+
+SECRET = b"0123456789abcdef0123456789abcdef"
+
+
+class CountingSigner(CodeSigner):
+    signed = 0
+
+    def sign(self, body, category="general"):
+        CountingSigner.signed += 1
+        return super().sign(body, category)
+
+
+def test_signed_codes_are_routed_to_their_shard(tmp_path):
+    signer = CountingSigner(SECRET)
+    rng = ShardedRNG(str(tmp_path / "codes.db"), shards=4, signer=signer)
+    # Con un proceso el trabajo corre aquí mismo y se pueden contar las firmas:
+    # solo se firman los códigos que se guardan, no los descartados de otros shards
+    codes = [data["code"] for data in rng.generate_codes(200, length=14, workers=1)]
+    assert len(set(codes)) == 200 and CountingSigner.signed == 200
+    codes.append(rng.generate_code(length=14)["code"])
+    assert CountingSigner.signed == 201
+
+    for code in codes:
+        assert signer.verify(code)
+        shard = rng.shard_for(code)
+        assert shard.conn.execute("SELECT 1 FROM codes WHERE code=?", (code,)).fetchone()
+    assert rng.use_code(codes[0]) is True
+    assert set(rng.use_codes(codes).values()) == {"redeemed", "already_used"}
+    rng.close()
@@ -0,0 +1,68 @@
+import pytest
+
+from stivion_huzz import CodeSigner, StivionHuzzRNG
+
+SECRET = b"0123456789abcdef0123456789abcdef"
+
+
+def test_sign_and_verify_round_trip():
+    signer = CodeSigner(SECRET)
+    for body in ("1234567", "ABCD123", "abCD12!@"):
+        code = signer.sign(body)
+        assert code.startswith(body) and len(code) == len(body) + signer.tag_length
+        assert signer.verify(code) is True
+        # Un carácter cambiado en el cuerpo o en la etiqueta invalida el código
+        assert signer.verify(("9" if code[0] != "9" else "8") + code[1:]) is False
+        assert signer.verify(code[:-1] + ("0" if code[-1] != "0" else "1")) is False
+
+
+def test_other_key_and_bound_category_reject():
+    signer = CodeSigner(SECRET, bind_category=True)
+    code = signer.sign("ABCD1234", "fortnite")
+    assert signer.verify(code, "fortnite") is True
+    assert signer.verify(code, "valorant") is False
+    assert signer.verify(code) is None
+    assert CodeSigner(b"another secret key!!", bind_category=True).verify(code, "fortnite") is False
+
+
+def test_bad_secret_or_tag_length():
+    with pytest.raises(ValueError):
+        CodeSigner(b"short")
+    with pytest.raises(ValueError):
+        CodeSigner(SECRET, tag_length=33)
+
+
+def test_forged_codes_never_reach_the_database(tmp_path):
+    rng = StivionHuzzRNG(str(tmp_path / "codes.db"), signer=CodeSigner(SECRET))
+    codes = [data["code"] for data in rng.generate_codes(20, length=14, batch="X")]
+    assert all(code.startswith("X") and len(code) == 14 and rng.verify_code(code) for code in codes)
+
+    statements = []
+    rng.conn.set_trace_callback(statements.append)
+    forged = [code[:-1] + ("0" if code[-1] != "0" else "1") for code in codes[:5]]
+    assert rng.use_code(forged[0]) is False
+    assert rng.use_codes(forged) == {code: "invalid" for code in forged}
+    assert statements == []
+
+    assert rng.use_codes(codes[:2]) == {codes[0]: "redeemed", codes[1]: "redeemed"}
+    assert rng.use_code(codes[0]) is False
+    assert rng.use_code(codes[2]) is True
+    rng.close()
+
+
+def test_non_ascii_input_is_invalid_not_an_error(tmp_path):
+    signer = CodeSigner(SECRET)
+    assert signer.verify("ABCDEF12345é") is False
+    assert signer.verify("ABCñEF123456") is False
+    rng = StivionHuzzRNG(str(tmp_path / "codes.db"), signer=signer)
+    code = rng.generate_code()["code"]
+    assert rng.use_code("ABCDEF12345é") is False
+    assert rng.use_codes(["ñandú123456", code]) == {"ñandú123456": "invalid", code: "redeemed"}
+    rng.close()
+
+
+def test_signed_code_too_short(tmp_path):
+    rng = StivionHuzzRNG(str(tmp_path / "codes.db"), signer=CodeSigner(SECRET))
+    with pytest.raises(ValueError):
+        rng.generate_code(length=8)
+    rng.close()
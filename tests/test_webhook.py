@@ -0,0 +1,69 @@
+import http.server
+import sqlite3
+import threading
+import time
+
+from stivion_huzz.core import SCHEMA_VERSION
+from stivion_huzz.webhook import WebhookDispatcher
+
+
+class FlakyHandler(http.server.BaseHTTPRequestHandler):
+    # Primero un 429 con un cuerpo JSON que no es un objeto, después 204
+    replies = []
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        status, body = self.replies.pop(0) if self.replies else (204, b"")
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_dispatcher_survives_bad_429_and_locked_database(tmp_path):
+    FlakyHandler.replies = [(429, b"[]")]
+    server = http.server.HTTPServer(("127.0.0.1", 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    db = str(tmp_path / "codes.db")
+    results = []
+    dispatcher = WebhookDispatcher(f"http://127.0.0.1:{server.server_port}/", db, flush_interval=0.05,
+                                   max_backoff=0.2, on_result=lambda ok, count: results.append((ok, count)))
+    dispatcher.conn.execute("PRAGMA busy_timeout=0")
+    locker = sqlite3.connect(db)
+    locker.execute("BEGIN EXCLUSIVE")
+    try:
+        dispatcher.start()
+        time.sleep(0.3)
+        assert dispatcher.thread.is_alive()
+        locker.rollback()
+        dispatcher.enqueue(["AAA", "BBB"])
+        wait_for(lambda: results)
+        assert dispatcher.thread.is_alive()
+        assert results == [(True, 2)]
+        assert dispatcher.pending() == 0
+    finally:
+        locker.close()
+        dispatcher.stop()
+        server.shutdown()
+        server.server_close()
+
+
+def test_outbox_is_part_of_the_schema(tmp_path):
+    db = str(tmp_path / "codes.db")
+    dispatcher = WebhookDispatcher("http://127.0.0.1:9/", db)
+    before = int(time.time())
+    dispatcher.enqueue(["AAA"])
+    (created,) = dispatcher.conn.execute("SELECT created_date FROM webhook_outbox").fetchone()
+    assert isinstance(created, int) and created >= before
+    assert dispatcher.conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    dispatcher.conn.close()